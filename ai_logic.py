@@ -1,7 +1,32 @@
+import heapq
+import itertools
+import math
+import os
+import random
+import struct
 import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
 from game_state import GameState
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; HeuristicEvaluator covers everything without it
+    np = None
+
 class HeuristicEvaluator:
+    """Scores a position from the pattern counts GameState keeps up to date.
+    
+    Every run of stones is counted once per line, so evaluation is a
+    handful of multiply-adds no matter how full the board is.
+    """
+    # Indexed like GameState's pattern kinds: closed/open twos, threes and
+    # fours, then fives
+    ROW_WEIGHTS = (2, 5, 10, 50, 100, 1000, 10000)
+    CAPTURE_THREAT_WEIGHT = 5
+    CENTER_WEIGHTS = (3, 2.5, 2)
+    
     @staticmethod
     def evaluate(game_state, player):
         score = 0
@@ -18,183 +43,1636 @@ class HeuristicEvaluator:
     
     @staticmethod
     def _evaluate_rows(game_state, player):
-        directions = [(0, 1), (1, 1), (1, 0), (1, -1)]
-        score = 0
-        
-        for i in range(game_state.BOARD_SIZE):
-            for j in range(game_state.BOARD_SIZE):
-                if game_state.board[i][j] == player:
-                    for dr, dc in directions:
-                        length = 1
-                        open_ends = 0
-                        r, c = i + dr, j + dc
-                        while 0 <= r < game_state.BOARD_SIZE and 0 <= c < game_state.BOARD_SIZE:
-                            if game_state.board[r][c] == player:
-                                length += 1
-                            elif game_state.board[r][c] == game_state.EMPTY:
-                                open_ends += 1
-                                break
-                            else:
-                                break
-                            r += dr
-                            c += dc
-                        r, c = i - dr, j - dc
-                        while 0 <= r < game_state.BOARD_SIZE and 0 <= c < game_state.BOARD_SIZE:
-                            if game_state.board[r][c] == player:
-                                length += 1
-                            elif game_state.board[r][c] == game_state.EMPTY:
-                                open_ends += 1
-                                break
-                            else:
-                                break
-                            r -= dr
-                            c -= dc
-                        if length >= 5:
-                            score += 10000
-                        elif length == 4:
-                            score += 1000 if open_ends == 2 else 100 if open_ends == 1 else 0
-                        elif length == 3:
-                            score += 50 if open_ends == 2 else 10 if open_ends == 1 else 0
-                        elif length == 2:
-                            score += 5 if open_ends == 2 else 2 if open_ends == 1 else 0
-        return score
+        counts = game_state.pattern_counts[player]
+        weights = HeuristicEvaluator.ROW_WEIGHTS
+        return (weights[0] * counts[0] + weights[1] * counts[1] + weights[2] * counts[2] +
+                weights[3] * counts[3] + weights[4] * counts[4] + weights[5] * counts[5] +
+                weights[6] * counts[6])
     
     @staticmethod
     def _evaluate_center_control(game_state, player):
-        score = 0
-        center = game_state.BOARD_SIZE // 2
-        for i in range(center-2, center+3):
-            for j in range(center-2, center+3):
-                if 0 <= i < game_state.BOARD_SIZE and 0 <= j < game_state.BOARD_SIZE:
-                    if game_state.board[i][j] == player:
-                        distance = max(abs(i - center), abs(j - center))
-                        score += 3 - distance * 0.5
-        return score
+        counts = game_state.center_counts[player]
+        weights = HeuristicEvaluator.CENTER_WEIGHTS
+        return weights[0] * counts[0] + weights[1] * counts[1] + weights[2] * counts[2]
     
     @staticmethod
     def _evaluate_potential_captures(game_state, player):
-        score = 0
+        return game_state.pattern_counts[player][GameState.CAPTURE_THREAT] * HeuristicEvaluator.CAPTURE_THREAT_WEIGHT
+    
+    @staticmethod
+    def score_moves(game_state, player, moves):
+        """One-ply root ordering scores: rows and capture threats after each move, less the distance from the center."""
+        center = game_state.BOARD_SIZE // 2
+        scores = {}
+        for move in moves:
+            row, col = move
+            game_state.make_move(row, col)
+            scores[move] = (HeuristicEvaluator._evaluate_rows(game_state, player) * 2 +
+                            HeuristicEvaluator._evaluate_potential_captures(game_state, player) * 3 -
+                            max(abs(row - center), abs(col - center)))
+            game_state.undo_move()
+        return scores
+
+
+class VectorEvaluator:
+    """NumPy version of HeuristicEvaluator that works on the whole board at once.
+    
+    The board is viewed as an int8 array (the same padded layout as
+    GameState.cells), and line patterns are found with strided gathers in
+    all four directions. score_moves scores every root candidate in one
+    batch; only moves that capture fall back to make/undo. Results match
+    the scalar evaluator exactly (see benchmark.py --check-numpy).
+    """
+    PAD = 7 * GameState.STRIDE  # room for the farthest gather, 6 steps past the board
+    
+    if np is not None:
+        STEPS = np.array(GameState.LINE_STEPS)
+        ALL_STEPS = np.array(GameState.ALL_STEPS)
+        ON_BOARD = np.array([GameState.index(r, c) for r in range(GameState.BOARD_SIZE)
+                             for c in range(GameState.BOARD_SIZE)]) + PAD
+        RINGS = np.array(GameState.CENTER_RINGS)
+        # Row score of a run by [min(size, 5)][open ends], as in GameState._scan_line
+        RUN_SCORES = np.zeros((6, 3), dtype=np.int64)
+        for _size in range(2, 5):
+            RUN_SCORES[_size, 1:] = HeuristicEvaluator.ROW_WEIGHTS[2 * (_size - 2):2 * (_size - 2) + 2]
+        RUN_SCORES[5, :] = HeuristicEvaluator.ROW_WEIGHTS[GameState.FIVE]
+        del _size
+    
+    @classmethod
+    def board_array(cls, game_state):
+        """The padded board as an int8 array, with extra OFFBOARD cells at both ends."""
+        board = np.full(len(game_state.cells) + 2 * cls.PAD, GameState.OFFBOARD, dtype=np.int8)
+        board[cls.PAD:cls.PAD + len(game_state.cells)] = np.frombuffer(game_state.cells, dtype=np.int8)
+        return board
+    
+    @classmethod
+    def pattern_counts(cls, board, player):
+        """Counts per GameState pattern kind for player, computed from scratch."""
         opponent = GameState.BLACK if player == GameState.WHITE else GameState.WHITE
-        directions = [(0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1)]
-        
-        for i in range(game_state.BOARD_SIZE):
-            for j in range(game_state.BOARD_SIZE):
-                if game_state.board[i][j] == player:
-                    for dr, dc in directions:
-                        r1, c1 = i + dr, j + dc
-                        r2, c2 = i + 2*dr, j + 2*dc
-                        r3, c3 = i + 3*dr, j + 3*dc
-                        if (0 <= r1 < game_state.BOARD_SIZE and 0 <= c1 < game_state.BOARD_SIZE and
-                            0 <= r2 < game_state.BOARD_SIZE and 0 <= c2 < game_state.BOARD_SIZE and
-                            0 <= r3 < game_state.BOARD_SIZE and 0 <= c3 < game_state.BOARD_SIZE):
-                            if (game_state.board[r1][c1] == opponent and 
-                                game_state.board[r2][c2] == opponent and 
-                                game_state.board[r3][c3] == game_state.EMPTY):
-                                score += 5
+        counts = np.zeros(GameState.PATTERN_KINDS, dtype=np.int64)
+        own = board == player
+        cells = cls.ON_BOARD
+        span = np.arange(5)
+        for step in GameState.LINE_STEPS:
+            starts = cells[own[cells] & ~own[cells - step]]
+            size = np.cumprod(own[starts[:, None] + span * step], axis=1).sum(axis=1)
+            open_ends = (board[starts - step] == 0).astype(np.int64) + (board[starts + size * step] == 0)
+            five = size >= 5
+            counts[GameState.FIVE] += five.sum()
+            runs = ~five & (size >= 2) & (open_ends > 0)
+            np.add.at(counts, 2 * (size[runs] - 2) + open_ends[runs] - 1, 1)
+            
+            window = board[cells[:, None] + span[:4] * step]
+            middle = (window[:, 1] == opponent) & (window[:, 2] == opponent)
+            counts[GameState.CAPTURE_THREAT] += (middle & (((window[:, 0] == player) & (window[:, 3] == 0)) |
+                                                           ((window[:, 0] == 0) & (window[:, 3] == player)))).sum()
+        return counts
+    
+    @classmethod
+    def evaluate(cls, game_state, player):
+        """Same score as HeuristicEvaluator.evaluate, from the board alone."""
+        board = cls.board_array(game_state)
+        opponent = GameState.BLACK if player == GameState.WHITE else GameState.WHITE
+        weights = np.array(HeuristicEvaluator.ROW_WEIGHTS)
+        own = cls.pattern_counts(board, player)
+        theirs = cls.pattern_counts(board, opponent)
+        rings = cls.RINGS[cls.ON_BOARD[board[cls.ON_BOARD] == player] - cls.PAD]
+        center = np.bincount(rings[rings >= 0], minlength=3).tolist()
+        center_weights = HeuristicEvaluator.CENTER_WEIGHTS
+        threat = GameState.CAPTURE_THREAT
+        
+        # Summed in the same order as the scalar evaluator so floats agree exactly
+        score = game_state.captures[player] * 10
+        score += int(own[:threat] @ weights[:threat])
+        score += center_weights[0] * center[0] + center_weights[1] * center[1] + center_weights[2] * center[2]
+        score += int(own[threat]) * HeuristicEvaluator.CAPTURE_THREAT_WEIGHT
+        score -= int(theirs[:threat] @ weights[:threat]) * 0.8
+        score -= int(theirs[threat]) * HeuristicEvaluator.CAPTURE_THREAT_WEIGHT * 0.8
         return score
+    
+    @classmethod
+    def score_moves(cls, game_state, player, moves):
+        """Batch version of HeuristicEvaluator.score_moves."""
+        mover = game_state.current_player
+        if player != mover or not moves:
+            return HeuristicEvaluator.score_moves(game_state, player, moves)
+        opponent = GameState.BLACK if player == GameState.WHITE else GameState.WHITE
+        board = cls.board_array(game_state)
+        index = np.array([GameState.index(row, col) for row, col in moves]) + cls.PAD
+        
+        # Moves that capture change lines away from the move; score those the slow way
+        steps = cls.ALL_STEPS
+        pair = (board[index[:, None] + steps] == opponent) & (board[index[:, None] + 2 * steps] == opponent)
+        captures = (pair & (board[index[:, None] + 3 * steps] == player)).any(axis=1)
+        new_threats = (pair & (board[index[:, None] + 3 * steps] == 0)).sum(axis=1)
+        
+        # A placed stone joins the runs just before and after it on each line
+        steps = cls.STEPS
+        reach = np.arange(1, 6)[:, None] * steps  # (distance, direction)
+        own = board == player
+        before = np.cumprod(own[index[:, None, None] - reach], axis=1).sum(axis=1)
+        after = np.cumprod(own[index[:, None, None] + reach], axis=1).sum(axis=1)
+        end_before = (board[index[:, None] - (before + 1) * steps] == 0).astype(np.int64)
+        end_after = (board[index[:, None] + (after + 1) * steps] == 0).astype(np.int64)
+        run_scores = cls.RUN_SCORES
+        delta = (run_scores[np.minimum(before + after + 1, 5), end_before + end_after]
+                 - run_scores[before, end_before + 1] - run_scores[after, end_after + 1]).sum(axis=1)
+        
+        counts = game_state.pattern_counts[player]
+        rows = HeuristicEvaluator._evaluate_rows(game_state, player) + delta
+        threats = counts[GameState.CAPTURE_THREAT] + new_threats
+        center = GameState.BOARD_SIZE // 2
+        rc = np.array(moves)
+        distance = np.abs(rc - center).max(axis=1)
+        scores = rows * 2 + threats * HeuristicEvaluator.CAPTURE_THREAT_WEIGHT * 3 - distance
+        
+        result = dict(zip(moves, scores.tolist()))
+        slow = [move for move, capture in zip(moves, captures.tolist()) if capture]
+        if slow:
+            result.update(HeuristicEvaluator.score_moves(game_state, player, slow))
+        return result
+
+
+class SearchStats:
+    """Counters for one get_best_move call; as_dict() gives them as plain data.
+    
+    The time_* fields stay at zero unless the AI was created with
+    profile=True, since reading the clock at every node costs more than
+    the counters themselves.
+    """
+    
+    def __init__(self):
+        self.nodes_by_ply = []
+        self.leaves = 0
+        self.interior = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.researches = 0
+        self.aspiration_fails = 0
+        self.quiescence_nodes = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.solver_nodes = 0
+        self.time_evaluation = 0.0
+        self.time_move_generation = 0.0
+        self.time_cloning = 0.0
+    
+    def add_node(self, ply):
+        nodes = self.nodes_by_ply
+        while len(nodes) <= ply:
+            nodes.append(0)
+        nodes[ply] += 1
+    
+    def merge(self, other):
+        """Add another search's counters (e.g. from a pool worker) to these."""
+        for ply, nodes in enumerate(other.nodes_by_ply):
+            while len(self.nodes_by_ply) <= ply:
+                self.nodes_by_ply.append(0)
+            self.nodes_by_ply[ply] += nodes
+        for name in ('leaves', 'interior', 'cutoffs', 'first_move_cutoffs', 'researches', 'aspiration_fails',
+                     'quiescence_nodes', 'tt_probes', 'tt_hits', 'solver_nodes', 'time_evaluation', 'time_move_generation',
+                     'time_cloning'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+    
+    def as_dict(self, iteration_log=()):
+        """The counters plus derived rates; iteration_log gives the effective branching factor."""
+        # Each iteration's own nodes, from the running totals in the log
+        totals = [nodes for _, _, nodes, _, _ in iteration_log]
+        per_iteration = [b - a for a, b in zip([self.solver_nodes] + totals, totals)]
+        branching = None
+        if len(per_iteration) >= 2 and per_iteration[-2] > 0:
+            branching = per_iteration[-1] / per_iteration[-2]
+        return {
+            "nodes_by_ply": list(self.nodes_by_ply),
+            "leaves": self.leaves,
+            "interior": self.interior,
+            "cutoffs": self.cutoffs,
+            "first_move_cutoff_rate": self.first_move_cutoffs / self.cutoffs if self.cutoffs else None,
+            "researches": self.researches,
+            "aspiration_fails": self.aspiration_fails,
+            "quiescence_nodes": self.quiescence_nodes,
+            "tt_probes": self.tt_probes,
+            "tt_hits": self.tt_hits,
+            "tt_hit_rate": self.tt_hits / self.tt_probes if self.tt_probes else None,
+            "solver_nodes": self.solver_nodes,
+            "nodes_by_iteration": per_iteration,
+            "effective_branching_factor": branching,
+            "time_evaluation": self.time_evaluation,
+            "time_move_generation": self.time_move_generation,
+            "time_cloning": self.time_cloning,
+        }
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the move deadline has passed."""
+
+
+class TranspositionTable:
+    """Fixed-size hash table of search results keyed by GameState.canonical_key().
+    
+    Each slot holds one (key, depth, flag, score, best_move, generation)
+    tuple, with best_move in the canonical frame, so rotated and mirrored
+    copies of a position share one entry. The table lives as long as its
+    MinimaxAI, so results carry over from move to move. A slot is
+    overwritten by the same position or by a search at least as deep as
+    the stored one, less one ply for every search since it was stored, so
+    deep entries survive a few moves while stale ones give way.
+    
+    save() and load() keep the table on disk between sessions (see
+    MinimaxAI's cache_file).
+    """
+    EXACT = 0
+    LOWER = 1  # score is a lower bound (fail high)
+    UPPER = 2  # score is an upper bound (fail low)
+    FLIPPED = (EXACT, UPPER, LOWER)  # the same bound seen from the other side
+    
+    MAGIC = b"PTT1"
+    HEADER = struct.Struct("<4sBI")  # magic, player the scores are for, record count
+    RECORD = struct.Struct("<QBBdHB")  # key, depth, flag, score, canonical move (row * 19 + col), age
+    NO_MOVE = 0xFFFF
+    MAX_AGE = 0xFF
+    
+    def __init__(self, size_bits=18):
+        self.size = 1 << size_bits
+        self.mask = self.size - 1
+        self.entries = [None] * self.size
+        self.generation = 0
+    
+    def new_search(self):
+        self.generation += 1
+    
+    def clear(self):
+        self.entries = [None] * self.size
+        self.generation = 0
+    
+    def probe(self, key):
+        entry = self.entries[key & self.mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+    
+    def store(self, key, depth, flag, score, best_move):
+        slot = key & self.mask
+        entry = self.entries[slot]
+        if (entry is None or entry[0] == key
+                or depth >= entry[1] - (self.generation - entry[5])):
+            self.entries[slot] = (key, depth, flag, score, best_move, self.generation)
+    
+    def save(self, path, player, max_entries=None):
+        """Write the table to path; returns the number of entries written.
+        
+        When max_entries is given, the most recent entries are kept, the
+        deepest first among entries of the same age. The file is written
+        beside path and moved into place, so an interrupted save leaves the
+        old file intact.
+        """
+        entries = [entry for entry in self.entries if entry is not None]
+        if max_entries is not None and len(entries) > max_entries:
+            entries.sort(key=lambda entry: (-entry[5], -entry[1]))
+            del entries[max_entries:]
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(self.HEADER.pack(self.MAGIC, player, len(entries)))
+            for key, depth, flag, score, move, generation in entries:
+                move = self.NO_MOVE if move is None else move[0] * GameState.BOARD_SIZE + move[1]
+                age = min(self.generation - generation, self.MAX_AGE)
+                f.write(self.RECORD.pack(key, depth, flag, score, move, age))
+        os.replace(temp_path, path)
+        return len(entries)
+    
+    def load(self, path, player):
+        """Merge the entries saved in path into the table; returns how many were read.
+        
+        Scores are from one player's point of view, so a file saved for
+        the other player is rejected. A file that is not a whole search
+        cache raises ValueError before any entry is merged.
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < self.HEADER.size:
+            raise ValueError(f"{path} is not a search cache")
+        magic, saved_player, count = self.HEADER.unpack_from(data, 0)
+        if magic != self.MAGIC:
+            raise ValueError(f"{path} is not a search cache")
+        if saved_player != player:
+            raise ValueError(f"{path} holds scores for player {saved_player}, not {player}")
+        if len(data) != self.HEADER.size + count * self.RECORD.size:
+            raise ValueError(f"{path} is truncated")
+        
+        # Oldest first, so newer entries win any slot they share
+        records = sorted(self.RECORD.iter_unpack(data[self.HEADER.size:self.HEADER.size + count * self.RECORD.size]),
+                         key=lambda record: -record[5])
+        for key, depth, flag, score, move, age in records:
+            move = None if move == self.NO_MOVE else divmod(move, GameState.BOARD_SIZE)
+            slot = key & self.mask
+            entry = self.entries[slot]
+            generation = self.generation - age
+            if entry is None or entry[5] < generation or (entry[5] == generation and depth >= entry[1]):
+                self.entries[slot] = (key, depth, flag, score, move, generation)
+        return count
+
+
+class MoveOrderer:
+    """Sorts moves so alpha-beta sees the likely cutoffs first.
+    
+    Moves are ranked by tier: the transposition-table move, immediate
+    wins, blocks of the opponent's immediate wins, captures, moves that
+    stop an opponent capture, then the killer moves for the ply. Within a
+    tier the history heuristic (or a caller-supplied score) breaks ties.
+    """
+    QUIET, KILLER, ANTI_CAPTURE, CAPTURE, BLOCK, WIN, HASH = range(7)
+    
+    def __init__(self, max_ply=64):
+        self.killers = [[None, None] for _ in range(max_ply)]
+        self.history = {GameState.BLACK: {}, GameState.WHITE: {}}
+    
+    def new_search(self):
+        for killers in self.killers:
+            killers[0] = killers[1] = None
+        # Keep the history from earlier moves, but let recent cutoffs dominate
+        for table in self.history.values():
+            for move in table:
+                table[move] //= 2
+    
+    def order(self, game_state, moves, ply, hash_move=None, scores=None):
+        player = game_state.current_player
+        opponent = GameState.BLACK if player == GameState.WHITE else GameState.WHITE
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        scores = scores if scores is not None else self.history[player]
+        own_captures = game_state.pattern_counts[player][GameState.CAPTURE_THREAT]
+        their_captures = game_state.pattern_counts[opponent][GameState.CAPTURE_THREAT]
+        
+        ranked = []
+        for move in moves:
+            row, col = move
+            if move == hash_move:
+                tier = self.HASH
+            elif game_state.makes_five(row, col, player):
+                tier = self.WIN
+            elif game_state.makes_five(row, col, opponent):
+                tier = self.BLOCK
+            elif own_captures and game_state.capture_count(row, col, player):
+                tier = self.WIN if game_state.is_winning_move(row, col, player) else self.CAPTURE
+            elif their_captures and game_state.capture_count(row, col, opponent):
+                tier = self.BLOCK if game_state.is_winning_move(row, col, opponent) else self.ANTI_CAPTURE
+            elif move in killers:
+                tier = self.KILLER
+            else:
+                tier = self.QUIET
+            ranked.append((tier, scores.get(move, 0), move))
+        
+        # The sort is stable, so equal keys keep the board scan order
+        ranked.sort(key=lambda item: (item[0], item[1]), reverse=True)
+        return [move for _, _, move in ranked]
+    
+    def staged(self, game_state, ply, hash_move=None):
+        """Yield moves in roughly the order of order(), computing each tier only when it is reached.
+        
+        The hash move comes first, before any move list is built. Each tier
+        after it is one pass over the candidates, skipped outright when the
+        pattern counts show it must be empty. The quiet moves are ordered
+        by history through a heap, so a cutoff early in the list leaves
+        most of it unsorted.
+        """
+        if hash_move is not None and game_state.is_valid_move(hash_move[0], hash_move[1]):
+            yield hash_move
+        else:
+            hash_move = None
+        
+        player = game_state.current_player
+        opponent = GameState.BLACK if player == GameState.WHITE else GameState.WHITE
+        moves = game_state.get_valid_moves()
+        scores = self.history[player]
+        done = {hash_move}
+        
+        def tier(test):
+            found = [move for move in moves if move not in done and test(*move)]
+            found.sort(key=lambda move: scores.get(move, 0), reverse=True)
+            done.update(found)
+            return found
+        
+        own_counts = game_state.pattern_counts[player]
+        their_counts = game_state.pattern_counts[opponent]
+        own_captures = own_counts[GameState.CAPTURE_THREAT]
+        their_captures = their_counts[GameState.CAPTURE_THREAT]
+        # A five needs a four, a three, or two twos that one stone can join, and
+        # a capture win needs enough capture threats on the board to reach five
+        for side, counts, threats in ((player, own_counts, own_captures), (opponent, their_counts, their_captures)):
+            five = self._may_make_five(counts)
+            needed = 5 - game_state.captures[side] if threats + game_state.captures[side] >= 5 else 0
+            if five or needed:
+                yield from tier(lambda row, col: (five and game_state.makes_five(row, col, side)) or
+                                (needed and game_state.capture_count(row, col, side) >= needed))
+        if own_captures:
+            yield from tier(lambda row, col: game_state.capture_count(row, col, player))
+        if their_captures:
+            yield from tier(lambda row, col: game_state.capture_count(row, col, opponent))
+        
+        if ply < len(self.killers):
+            for killer in self.killers[ply]:
+                if killer is not None and killer not in done and game_state.is_valid_move(killer[0], killer[1]):
+                    done.add(killer)
+                    yield killer
+        
+        # Ties keep the board scan order, as in order()
+        quiet = [(-scores.get(move, 0), n, move) for n, move in enumerate(moves) if move not in done]
+        heapq.heapify(quiet)
+        while quiet:
+            yield heapq.heappop(quiet)[2]
+    
+    @staticmethod
+    def _may_make_five(counts):
+        return (counts[GameState.CLOSED_FOUR] or counts[GameState.OPEN_FOUR] or counts[GameState.CLOSED_THREE]
+                or counts[GameState.OPEN_THREE] or counts[GameState.CLOSED_TWO] + counts[GameState.OPEN_TWO] >= 2)
+    
+    def record_cutoff(self, game_state, move, ply, depth):
+        """Credit a move that caused a beta cutoff; game_state has the move undone."""
+        player = game_state.current_player
+        table = self.history[player]
+        table[move] = table.get(move, 0) + depth * depth
+        if ply < len(self.killers) and not game_state.capture_count(move[0], move[1], player):
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+
+
+class ThreatSolver:
+    """Threat-space search: looks for a forced win using only forcing moves.
+    
+    The attacker may only play fours (moves that leave a five to complete),
+    capture threats when one more capture wins, and, for the first
+    threes_depth moves, threes that threaten an open four. The defender
+    only tries the replies that can matter: the cells that stop the threat,
+    captures and counter-fours. A win found this way is forced; not finding
+    one proves nothing.
+    """
+    WINS, FOURS, THREES, CAPTURES, CAPTURE_THREATS = range(5)
+    _NO_THREATS = ((), (), (), (), ())
+    _line_cache = {}  # (line contents, player) -> _scan_segment result, shared by all solvers
+    
+    def __init__(self, max_depth=10, threes_depth=1, max_nodes=5000):
+        self.max_depth = max_depth  # attacker moves
+        self.threes_depth = threes_depth
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.deadline = float('inf')  # set by solve(); MinimaxAI.ponderhit() may lower it before then
+        self.stop_requested = False
+        self._proven = {}
+        self._line_threats = []  # per line: (None, black threats, white threats)
+        self._active = set()  # lines holding any threat
+        self._undo = []
+    
+    def solve(self, game_state, deadline=float('inf')):
+        """Return a move that wins by force for the player to move, or None."""
+        self.nodes = 0
+        self.deadline = deadline
+        self._proven = {}
+        state = game_state.clone()
+        self._line_threats = [None] * len(GameState.LINES)
+        self._active = set()
+        self._undo = []
+        self._rescan(state, range(len(GameState.LINES)))
+        # Deepen one attacker move at a time so short wins are found first
+        try:
+            for depth in range(1, self.max_depth + 1):
+                move = self._attack(state, depth, self.threes_depth)
+                if move is not None:
+                    return GameState.coords(move)
+        except SearchTimeout:
+            pass
+        return None
+    
+    @staticmethod
+    def _scan_segment(segment, player):
+        """Threat offsets in one line: (wins, fours, threes, captures, capture threats).
+        
+        wins complete five; fours leave a five to complete; threes leave an
+        open four to make; captures take a pair (listed once per pair);
+        capture threats set one up.
+        """
+        opponent = GameState.BLACK if player == GameState.WHITE else GameState.WHITE
+        n = len(segment)
+        wins, fours, threes, captures, capture_threats = set(), set(), set(), [], set()
+        for k in range(n - 4):
+            window = segment[k:k + 5]
+            own = window.count(player)
+            if own >= 3 and own + window.count(0) == 5:
+                empties = [k + j for j in range(5) if window[j] == 0]
+                (wins if own == 4 else fours).update(empties)
+        for k in range(n - 5):
+            window = segment[k:k + 6]
+            if window[0] == 0 and window[5] == 0 and window.count(player) == 2 and window.count(0) == 4:
+                threes.update(k + j for j in range(1, 5) if window[j] == 0)
+        for k in range(n - 3):
+            a, b, c, d = segment[k:k + 4]
+            if b == opponent and c == opponent:
+                if a == player and d == 0:
+                    captures.append(k + 3)
+                elif a == 0 and d == player:
+                    captures.append(k)
+                elif a == 0 and d == 0:
+                    capture_threats.update((k, k + 3))
+        return (tuple(wins), tuple(fours), tuple(threes - fours), tuple(captures), tuple(capture_threats))
+    
+    @classmethod
+    def line_threats(cls, segment, player):
+        """_scan_segment of one line's contents, memoized for every solver and search."""
+        cache = cls._line_cache
+        found = cache.get((segment, player))
+        if found is None:
+            if len(cache) > 200000:
+                cache.clear()
+            found = cache[segment, player] = cls._scan_segment(segment, player)
+        return found
+    
+    def _rescan(self, state, lines):
+        """Refresh the per-line threat tables; returns what they held, for _unplay."""
+        cells = state.cells
+        saved = []
+        for line in lines:
+            start, step, length = GameState.LINES[line]
+            segment = bytes(cells[start:start + length * step:step])
+            entry = [None, self.line_threats(segment, GameState.BLACK), self.line_threats(segment, GameState.WHITE)]
+            saved.append((line, self._line_threats[line]))
+            self._line_threats[line] = entry
+            if entry[1] == entry[2] == self._NO_THREATS:
+                self._active.discard(line)
+            else:
+                self._active.add(line)
+        return saved
+    
+    def _play(self, state, index):
+        row, col = GameState.coords(index)
+        state.make_move(row, col)
+        lines = {ids[index] for ids in GameState.LINE_IDS}
+        for r, c in state.move_history[-1].captured:
+            i = GameState.index(r, c)
+            lines.update(ids[i] for ids in GameState.LINE_IDS)
+        self._undo.append(self._rescan(state, lines))
+    
+    def _unplay(self, state):
+        state.undo_move()
+        for line, entry in self._undo.pop():
+            self._line_threats[line] = entry
+            if entry[1] == entry[2] == self._NO_THREATS:
+                self._active.discard(line)
+            else:
+                self._active.add(line)
+    
+    def _threats(self, state, player):
+        """Board-wide threat cells for player: wins, fours, threes, captures
+        (cell -> pairs) and capture threats."""
+        wins, fours, threes, capture_threats = set(), set(), set(), set()
+        captures = {}
+        for line in self._active:
+            found = self._line_threats[line][player]
+            if found == self._NO_THREATS:
+                continue
+            start, step, _ = GameState.LINES[line]
+            for kind, target in ((0, wins), (1, fours), (2, threes), (4, capture_threats)):
+                for k in found[kind]:
+                    target.add(start + k * step)
+            for k in found[3]:
+                i = start + k * step
+                captures[i] = captures.get(i, 0) + 1
+        total = state.captures[player]
+        for i, pairs in captures.items():
+            if total + pairs >= 5:
+                wins.add(i)
+        return wins, fours, threes, captures, capture_threats
+    
+    def _attack(self, state, depth, threes):
+        """Winning move index for the player to move, or None."""
+        self.nodes += 1
+        if self.nodes > self.max_nodes or self.stop_requested or time.time() > self.deadline:
+            raise SearchTimeout()
+        
+        attacker = state.current_player
+        own = self._threats(state, attacker)
+        if own[self.WINS]:
+            return min(own[self.WINS])
+        if depth == 0:
+            return None
+        key = (state.hash, depth, threes)
+        if key in self._proven:
+            return self._proven[key]
+        
+        moves = [(i, False) for i in sorted(own[self.FOURS])]
+        if state.captures[attacker] == 4:
+            moves += [(i, False) for i in sorted(own[self.CAPTURE_THREATS] - own[self.FOURS])]
+        if threes:
+            moves += [(i, True) for i in sorted(own[self.THREES])]
+        
+        defender = GameState.BLACK if attacker == GameState.WHITE else GameState.WHITE
+        result = None
+        for move, is_three in moves:
+            self._play(state, move)
+            theirs = self._threats(state, defender)
+            # A threat that leaves the opponent a win of their own is no threat
+            if not theirs[self.WINS] and self._defend(state, move, is_three, theirs, depth - 1, threes - is_three):
+                result = move
+            self._unplay(state)
+            if result is not None:
+                break
+        
+        self._proven[key] = result
+        return result
+    
+    def _defend(self, state, move, is_three, theirs, depth, threes):
+        """True if the attacker still wins after every reply that could stop the threat."""
+        attacker = GameState.BLACK if state.current_player == GameState.WHITE else GameState.WHITE
+        if is_three:
+            # Anything near the three on its lines may break it
+            cells = state.cells
+            replies = set()
+            for step in GameState.ALL_STEPS:
+                i = move + step
+                for _ in range(5):
+                    if cells[i] == GameState.OFFBOARD:
+                        break
+                    if cells[i] == GameState.EMPTY:
+                        replies.add(i)
+                    i += step
+            # Counter-threats gain a tempo against a three, but not against a four
+            replies |= theirs[self.FOURS]
+            if state.captures[state.current_player] == 4:
+                replies |= theirs[self.CAPTURE_THREATS]
+        else:
+            replies = set(self._threats(state, attacker)[self.WINS])
+        # Captures can break any threat
+        replies.update(theirs[self.CAPTURES])
+        
+        for reply in sorted(replies):
+            self._play(state, reply)
+            won = not state.game_over and self._attack(state, depth, threes) is not None
+            self._unplay(state)
+            if not won:
+                return False
+        return True
 
 
 class MinimaxAI:
-    def __init__(self, player, max_depth=2, time_limit=2.0):
+    WIN_SCORE = 100000
+    MAX_MOVES = 50  # widest move list searched at any node
+    ASPIRATION_WINDOW = 50  # half-width of the root window around the previous iteration's score
+    DELTA_MARGIN = 200  # most a capture is taken to gain in quiescence search
+    SOLVER_SHARE = 0.2  # most of the time limit the threat solver may use
+    
+    def __init__(self, player, max_depth=2, time_limit=2.0, tt_size_bits=18, candidate_radius=None, workers=1,
+                 book=None, threat_depth=10, cache_file=None, cache_entries=None, profile=False, trace=None,
+                 quiescence_depth=4):
         self.player = player
         self.max_depth = max_depth
         self.time_limit = time_limit
+        self.candidate_radius = candidate_radius  # None keeps the game state's own radius
         self.nodes_evaluated = 0
+        self.completed_depth = 0
+        self.iteration_log = []  # (depth, seconds since start, nodes so far, move, score) per finished iteration
         self.start_time = None
+        self.deadline = None
+        self.stop_requested = False
+        self.tt = TranspositionTable(tt_size_bits)
+        self.orderer = MoveOrderer()
+        
+        # Search statistics: stats is rebuilt by every get_best_move, and
+        # trace(stats dict) is called after each finished iteration
+        self.stats = SearchStats()
+        self.principal_variation = []  # expected line from the deepest finished iteration
+        self.profile = profile
+        self.trace = trace
+        
+        # Root-parallel search: root moves are farmed out to a process pool
+        # that lives as long as this object, so each worker keeps its own
+        # transposition table warm from one move to the next.
+        self.workers = workers
+        self.tt_size_bits = tt_size_bits
+        self._pool = None
+        self._root_bound = None
+        self._iteration = 0
+        self._search_id = 0
+        self._control = None  # in a pool worker: its parent's shared array, polled for stop and deadline
+        
+        # Opening book: a path or an OpeningBook, consulted before searching
+        if isinstance(book, str):
+            from opening_book import OpeningBook
+            book = OpeningBook(book)
+        self.book = book
+        
+        # Forced wins via fours and capture threats are looked for before searching
+        self.solver = ThreatSolver(threat_depth) if threat_depth else None
+        
+        # Plies of captures and fours searched past max_depth (0 turns it off)
+        self.quiescence_depth = quiescence_depth
+        
+        # Search results kept on disk between sessions, at most cache_entries of them
+        self.cache_file = cache_file
+        self.cache_entries = cache_entries
+        if cache_file is not None and os.path.exists(cache_file):
+            try:
+                self.tt.load(cache_file, player)
+            except (OSError, ValueError, struct.error):
+                # A damaged or foreign cache only costs a cold start; save() replaces it
+                self.tt.clear()
+    
+    def stop(self):
+        """Ask a running get_best_move (e.g. on another thread) to finish now.
+        
+        The search returns the best move of the deepest iteration completed
+        so far, exactly as if its time limit had run out.
+        """
+        self.stop_requested = True
+        if self.solver is not None:
+            self.solver.stop_requested = True
+        if self._root_bound is not None:
+            self._root_bound[3] = 1.0
+    
+    def save_cache(self):
+        """Write the transposition table to cache_file, if one was given."""
+        if self.cache_file is not None:
+            self.tt.save(self.cache_file, self.player, self.cache_entries)
+    
+    def close(self):
+        """Save the search cache and shut down the worker pool, if one was started."""
+        self.save_cache()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def _get_pool(self):
+        if self._pool is None:
+            # [iteration id, best root score so far, deadline, stop flag], shared by all workers
+            self._root_bound = multiprocessing.Array('d', [0.0, float('-inf'), float('inf'), 0.0])
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_search_worker,
+                initargs=(self.player, self.tt_size_bits, self._root_bound, self.profile, self.quiescence_depth))
+        return self._pool
     
-    def get_best_move(self, game_state):
+    def predict_reply(self, game_state):
+        """Guess the opponent's move in game_state, for pondering.
+        
+        The previous search's transposition-table move is used when there
+        is one; otherwise the best-ordered move by the one-ply score.
+        """
+        if game_state.game_over:
+            return None
+        move = self._hash_move(game_state)
+        if move is not None and game_state.is_valid_move(move[0], move[1]):
+            return move
+        state = game_state.clone()
+        moves = state.get_valid_moves()
+        if not moves:
+            return None
+        scorer = VectorEvaluator if np is not None else HeuristicEvaluator
+        scores = scorer.score_moves(state, state.current_player, moves)
+        return self.orderer.order(state, moves, 0, None, scores)[0]
+    
+    def ponderhit(self):
+        """Turn a running ponder search into a normal one with a full time_limit from now."""
+        now = time.time()
+        self.deadline = now + self.time_limit
+        if self.solver is not None:
+            self.solver.deadline = min(self.solver.deadline, now + self.time_limit * self.SOLVER_SHARE)
+        if self._root_bound is not None:
+            self._root_bound[2] = self.deadline
+    
+    def get_best_move(self, game_state, exclude=(), ponder=False):
+        """Search depth 1, 2, ... up to max_depth until time_limit runs out.
+        
+        The returned move always comes from the deepest iteration that
+        finished; an iteration interrupted by the deadline is thrown away.
+        Root moves in exclude are not considered (used to find runner-ups).
+        With ponder set there is no deadline until ponderhit() is called;
+        stop() still ends the search.
+        """
         self.nodes_evaluated = 0
+        self.completed_depth = 0
+        self.iteration_log = []
+        self.stats = SearchStats()
+        self.principal_variation = []
         self.start_time = time.time()
-        best_score = float('-inf')
-        best_move = None
-        alpha = float('-inf')
-        beta = float('inf')
+        self.deadline = float('inf') if ponder else self.start_time + self.time_limit
+        self.stop_requested = False
+        if self.solver is not None:
+            self.solver.stop_requested = False
+        self.tt.new_search()
+        self.orderer.new_search()
+        self._search_id += 1
         
-        valid_moves = game_state.get_valid_moves()
         center = game_state.BOARD_SIZE // 2
         
-        if len(game_state.move_history) == 0:
+        if len(game_state.move_history) == 0 and not exclude:
             return (center, center)
         
-        # Sort moves based on heuristic evaluation
-        move_scores = []
-        for move in valid_moves:
-            row, col = move
-            new_state = game_state.clone()
-            new_state.make_move(row, col)
-            score = (HeuristicEvaluator._evaluate_rows(new_state, self.player) * 2 +
-                     HeuristicEvaluator._evaluate_potential_captures(new_state, self.player) * 3 -
-                     max(abs(row - center), abs(col - center)))
-            move_scores.append((score, move))
-        move_scores.sort(reverse=True)
-        valid_moves = [move for _, move in move_scores]
-        
-        for move in valid_moves[:50]:
-            row, col = move
-            new_state = game_state.clone()
-            new_state.make_move(row, col)
+        if self.book is not None and not exclude:
+            move = self.book.lookup(game_state)
+            if move is not None:
+                return move
+        
+        # A position already searched to full depth (earlier this game or in
+        # an earlier session) is answered from the table
+        if not exclude:
+            entry, move = self._probe(game_state)
+            if (entry is not None and entry[2] == TranspositionTable.EXACT and entry[1] >= self.max_depth
+                    and move is not None and game_state.is_valid_move(move[0], move[1])):
+                self.completed_depth = entry[1]
+                return move
+        
+        if self.solver is not None and not exclude:
+            solver_deadline = self.deadline if ponder else self.start_time + self.time_limit * self.SOLVER_SHARE
+            move = self.solver.solve(game_state, solver_deadline)
+            self.nodes_evaluated += self.solver.nodes
+            self.stats.solver_nodes = self.solver.nodes
+            if move is not None:
+                return move
+        
+        # Search on a private copy with make/undo so the caller's state is untouched
+        clone_start = time.perf_counter()
+        state = game_state.clone()
+        self.stats.time_cloning += time.perf_counter() - clone_start
+        if self.candidate_radius is not None and self.candidate_radius != state.candidate_radius:
+            state.set_candidate_radius(self.candidate_radius)
+        valid_moves = [move for move in state.get_valid_moves() if move not in exclude]
+        if not valid_moves:
+            return None
+        
+        # Within each ordering tier, root moves are ranked by a one-ply heuristic score
+        scorer = VectorEvaluator if np is not None else HeuristicEvaluator
+        move_scores = scorer.score_moves(state, self.player, valid_moves)
+        root_moves = self.orderer.order(state, valid_moves, 0, self._hash_move(state), move_scores)[:self.MAX_MOVES]
+        
+        best_move = None
+        score = None
+        for depth in range(1, self.max_depth + 1):
+            try:
+                if self.workers > 1:
+                    move, score = self._search_root_parallel(state, root_moves, depth)
+                else:
+                    move, score = self._search_root_aspiration(state, root_moves, depth, score)
+            except SearchTimeout:
+                break
+            best_move = move
+            self.completed_depth = depth
+            self.principal_variation = self._principal_variation(state, depth)
+            self.iteration_log.append((depth, time.time() - self.start_time, self.nodes_evaluated, move, score))
+            if self.trace is not None:
+                self.trace(dict(self.search_stats(), depth=depth, move=move, score=score))
             
-            score = self._minimax(new_state, self.max_depth - 1, alpha, beta, False)
+            # The next iteration starts from this iteration's best move
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+            
+            if abs(score) >= self.WIN_SCORE:
+                break
+        
+        return best_move or root_moves[0]
+    
+    def search_stats(self):
+        """Statistics of the latest get_best_move as a dict (see SearchStats.as_dict)."""
+        stats = self.stats.as_dict(self.iteration_log)
+        stats["nodes"] = self.nodes_evaluated
+        stats["completed_depth"] = self.completed_depth
+        stats["elapsed"] = time.time() - self.start_time if self.start_time is not None else 0.0
+        stats["principal_variation"] = list(self.principal_variation)
+        return stats
+    
+    def _search_root_aspiration(self, state, root_moves, depth, guess):
+        """Search the root in a narrow window around guess, widening whichever side fails."""
+        if guess is None or abs(guess) >= self.WIN_SCORE:
+            return self._search_root(state, root_moves, depth)
+        alpha = guess - self.ASPIRATION_WINDOW
+        beta = guess + self.ASPIRATION_WINDOW
+        while True:
+            move, score = self._search_root(state, root_moves, depth, alpha, beta)
+            if score <= alpha:
+                alpha = float('-inf')
+            elif score >= beta:
+                beta = float('inf')
+                # The move that failed high leads the re-search
+                root_moves.remove(move)
+                root_moves.insert(0, move)
+            else:
+                return move, score
+            self.stats.aspiration_fails += 1
+    
+    def _search_root(self, state, root_moves, depth, alpha=float('-inf'), beta=float('inf')):
+        """Principal variation search over the root moves; stops at the first fail high."""
+        best_score = float('-inf')
+        best_move = None
+        alpha_orig = alpha
+        
+        for n, move in enumerate(root_moves):
+            row, col = move
+            state.make_move(row, col)
+            if n == 0:
+                score = -self._negamax(state, depth - 1, -beta, -alpha, 1)
+            else:
+                score = -self._negamax(state, depth - 1, -alpha - 1, -alpha, 1)
+                if alpha + 1 <= score < beta:
+                    self.stats.researches += 1
+                    score = -self._negamax(state, depth - 1, -beta, -alpha, 1)
+            state.undo_move()
             
             if score > best_score:
                 best_score = score
                 best_move = move
             
             alpha = max(alpha, best_score)
-            
-            if time.time() - self.start_time > self.time_limit:
+            if alpha >= beta:
+                break
+        
+        if best_score <= alpha_orig:
+            flag = TranspositionTable.UPPER
+        elif best_score >= beta:
+            flag = TranspositionTable.LOWER
+        else:
+            flag = TranspositionTable.EXACT
+        self._store(state, depth, flag, best_score, best_move)
+        return best_move, best_score
+    
+    def _principal_variation(self, state, depth):
+        """The expected line from state, following transposition-table moves."""
+        line = []
+        while len(line) < depth and not state.game_over:
+            move = self._hash_move(state)
+            if move is None or not state.is_valid_move(move[0], move[1]):
                 break
+            state.make_move(move[0], move[1])
+            line.append(move)
+        for _ in line:
+            state.undo_move()
+        return line
+    
+    def _search_root_parallel(self, state, root_moves, depth):
+        pool = self._get_pool()
+        self._iteration += 1
+        with self._root_bound.get_lock():
+            self._root_bound[0] = self._iteration
+            self._root_bound[1] = float('-inf')
+            self._root_bound[2] = self.deadline
+            self._root_bound[3] = float(self.stop_requested)
         
-        return best_move or valid_moves[0]
+        futures = [pool.submit(_search_root_move, state, move, depth, self._search_id, self._iteration)
+                   for move in root_moves]
+        pending = futures
+        while pending and not self.stop_requested and time.time() < self.deadline:
+            done, pending = wait(pending, timeout=min(0.05, max(0.0, self.deadline - time.time())))
+        done = [future for future in futures if future.done()]
+        if pending:
+            # Moves already running in a worker stop at their next node
+            self._root_bound[3] = 1.0
+        for future in pending:
+            future.cancel()
+        
+        best_score = float('-inf')
+        best_move = None
+        timed_out = bool(pending)
+        for future in futures:
+            if future not in done:
+                continue
+            move, score, exact, nodes, stats = future.result()
+            self.nodes_evaluated += nodes
+            self.stats.merge(stats)
+            if score is None:
+                timed_out = True
+            elif exact and score > best_score:
+                # Fail-low scores are only upper bounds, so they never win a tie
+                best_score = score
+                best_move = move
+        if timed_out:
+            raise SearchTimeout()
+        
+        self._store(state, depth, TranspositionTable.EXACT, best_score, best_move)
+        return best_move, best_score
+    
+    def _probe(self, game_state):
+        """Return (entry, hash move) for a position, with the move mapped back to its frame.
+        
+        Not counted in the statistics; _negamax counts its own probes, so
+        PV extraction and reply prediction do not inflate the hit rate.
+        """
+        key, transform = game_state.canonical_key()
+        entry = self.tt.probe(key)
+        if entry is None or entry[4] is None:
+            return entry, None
+        return entry, GameState.transform_move(entry[4], GameState.INVERSE_SYMMETRY[transform])
     
-    def _minimax(self, game_state, depth, alpha, beta, maximizing):
+    def _store(self, game_state, depth, flag, score, best_move):
+        key, transform = game_state.canonical_key()
+        if best_move is not None:
+            best_move = GameState.transform_move(best_move, transform)
+        self.tt.store(key, depth, flag, score, best_move)
+    
+    def _hash_move(self, game_state):
+        return self._probe(game_state)[1]
+    
+    def _negamax(self, game_state, depth, alpha, beta, ply):
+        """Fail-soft alpha-beta in negamax form, with principal variation search.
+        
+        Scores are for the side to move. The first move is searched with
+        the full window; later moves only with a null window around alpha,
+        and again with the full window if they turn out better.
+        """
+        if depth == 0 and self.quiescence_depth and not game_state.game_over:
+            return self._quiescence(game_state, alpha, beta, ply, self.quiescence_depth)
+        
         self.nodes_evaluated += 1
+        stats = self.stats
+        stats.add_node(ply)
         
-        if game_state.game_over or depth == 0 or (time.time() - self.start_time > self.time_limit):
-            return self._evaluate_state(game_state)
+        if game_state.game_over or depth == 0:
+            stats.leaves += 1
+            if self.profile:
+                start = time.perf_counter()
+                score = self._evaluate_state(game_state)
+                stats.time_evaluation += time.perf_counter() - start
+            else:
+                score = self._evaluate_state(game_state)
+            return score if game_state.current_player == self.player else -score
+        if self._out_of_time():
+            raise SearchTimeout()
+        stats.interior += 1
         
-        if maximizing:
-            max_eval = float('-inf')
-            valid_moves = game_state.get_valid_moves()
-            
-            for move in valid_moves[:50]:
-                row, col = move
-                new_state = game_state.clone()
-                new_state.make_move(row, col)
-                
-                eval_score = self._minimax(new_state, depth - 1, alpha, beta, False)
-                max_eval = max(max_eval, eval_score)
-                
-                alpha = max(alpha, eval_score)
-                if beta <= alpha:
-                    break
+        # The table keeps scores for self.player; flip them for the opponent
+        own_turn = game_state.current_player == self.player
+        alpha_orig, beta_orig = alpha, beta
+        entry, hash_move = self._probe(game_state)
+        stats.tt_probes += 1
+        if entry is not None:
+            stats.tt_hits += 1
+        if entry is not None and entry[1] >= depth:
+            _, _, flag, score, _, _ = entry
+            if not own_turn:
+                score = -score
+                flag = TranspositionTable.FLIPPED[flag]
+            if flag == TranspositionTable.EXACT:
+                return score
+            elif flag == TranspositionTable.LOWER:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if beta <= alpha:
+                return score
+        
+        moves = self.orderer.staged(game_state, ply, hash_move)
+        if self.profile:
+            moves = self._timed_moves(moves)
+        best_move = None
+        best_score = float('-inf')
+        
+        for n, move in enumerate(itertools.islice(moves, self.MAX_MOVES)):
+            row, col = move
+            game_state.make_move(row, col)
+            if n == 0:
+                score = -self._negamax(game_state, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                score = -self._negamax(game_state, depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha + 1 <= score < beta:
+                    stats.researches += 1
+                    score = -self._negamax(game_state, depth - 1, -beta, -alpha, ply + 1)
+            game_state.undo_move()
+            if score > best_score:
+                best_score = score
+                best_move = move
             
-            return max_eval
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                self.orderer.record_cutoff(game_state, move, ply, depth)
+                stats.cutoffs += 1
+                stats.first_move_cutoffs += n == 0
+                break
         
+        if best_score <= alpha_orig:
+            flag = TranspositionTable.UPPER
+        elif best_score >= beta_orig:
+            flag = TranspositionTable.LOWER
         else:
-            min_eval = float('inf')
-            valid_moves = game_state.get_valid_moves()
-            
-            for move in valid_moves[:50]:
-                row, col = move
-                new_state = game_state.clone()
-                new_state.make_move(row, col)
-                
-                eval_score = self._minimax(new_state, depth - 1, alpha, beta, True)
-                min_eval = min(min_eval, eval_score)
-                
-                beta = min(beta, eval_score)
-                if beta <= alpha:
-                    break
+            flag = TranspositionTable.EXACT
+        if own_turn:
+            self._store(game_state, depth, flag, best_score, best_move)
+        else:
+            self._store(game_state, depth, TranspositionTable.FLIPPED[flag], -best_score, best_move)
+        
+        return best_score
+    
+    def _out_of_time(self):
+        """True once the deadline has passed or stop() was called.
+        
+        A root-parallel worker also stops when its parent stops, moves its
+        deadline (ponderhit) or has gone on to another iteration.
+        """
+        now = time.time()
+        if self.stop_requested or now > self.deadline:
+            return True
+        control = self._control
+        return control is not None and (control[0] != self._iteration or control[3] or now > control[2])
+    
+    def _quiescence(self, game_state, alpha, beta, ply, depth):
+        """Search only tactical moves until the position is quiet; scores are for the side to move.
+        
+        An immediate win ends the search. If the opponent threatens to win,
+        only the blocks and captures are tried, and there is no stand-pat.
+        Otherwise the side to move may stand pat on the evaluation or try
+        fours, captures, and capture threats when at four captures. A
+        capture that cannot lift the score by DELTA_MARGIN to alpha is
+        skipped.
+        """
+        self.nodes_evaluated += 1
+        stats = self.stats
+        stats.add_node(ply)
+        stats.quiescence_nodes += 1
+        
+        # The clock is only checked at interior _negamax nodes, so depth 1
+        # always finishes; quiescence is bounded by quiescence_depth instead
+        if game_state.game_over:
+            return self._stand_pat(game_state)
+        
+        player = game_state.current_player
+        opponent = GameState.BLACK if player == GameState.WHITE else GameState.WHITE
+        # Standing pat is only safe when the opponent has no win to play next
+        their_wins = self._tactics(game_state, opponent, wins_only=True)[0]
+        if not their_wins:
+            best_score = self._stand_pat(game_state)
+            if best_score >= beta:
+                return best_score
+        
+        own_wins, own_fours, own_captures, own_threats = self._tactics(game_state, player)
+        if own_wins:
+            return self.WIN_SCORE
+        
+        if their_wins:
+            if depth == 0:
+                return self._stand_pat(game_state)
+            best_score = float('-inf')
+            moves = sorted(their_wins | own_captures.keys())
+        else:
+            if depth == 0:
+                return best_score
+            alpha = max(alpha, best_score)
             
-            return min_eval
+            moves = sorted(own_fours)
+            if best_score + self.DELTA_MARGIN >= alpha:
+                moves += sorted(own_captures.keys() - own_fours)
+                if game_state.captures[player] == 4:
+                    moves += sorted(own_threats - own_fours - own_captures.keys())
+        
+        stats.interior += 1
+        for n, index in enumerate(moves):
+            row, col = GameState.coords(index)
+            game_state.make_move(row, col)
+            score = -self._quiescence(game_state, -beta, -alpha, ply + 1, depth - 1)
+            game_state.undo_move()
+            if score > best_score:
+                best_score = score
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                stats.cutoffs += 1
+                stats.first_move_cutoffs += n == 0
+                break
+        return best_score
+    
+    def _stand_pat(self, game_state):
+        """The static evaluation, for the side to move."""
+        stats = self.stats
+        stats.leaves += 1
+        if self.profile:
+            start = time.perf_counter()
+            score = self._evaluate_state(game_state)
+            stats.time_evaluation += time.perf_counter() - start
+        else:
+            score = self._evaluate_state(game_state)
+        return score if game_state.current_player == self.player else -score
+    
+    def _tactics(self, game_state, player, wins_only=False):
+        """Cell indices where player wins, makes a four, captures ({cell: pairs}) or threatens a capture.
+        
+        Only lines where the player has some pattern are scanned, through
+        ThreatSolver's memoized line scans, and none at all when the
+        pattern counts rule everything out. Wins include captures that
+        reach five.
+        """
+        wins, fours, threats = set(), set(), set()
+        captures = {}
+        counts = game_state.pattern_counts[player]
+        total = game_state.captures[player]
+        pending = counts[GameState.CAPTURE_THREAT]
+        may_win = MoveOrderer._may_make_five(counts) or total + pending >= 5
+        if not may_win and (wins_only or not (pending or any(counts[:GameState.FIVE]))):
+            return wins, fours, captures, threats
+        
+        cells = game_state.cells
+        no_patterns = GameState._EMPTY_LINE[0]
+        no_threats = ThreatSolver._NO_THREATS
+        side = player - 1
+        for line, patterns in enumerate(game_state.line_patterns):
+            if patterns[side] == no_patterns:
+                continue
+            start, step, length = GameState.LINES[line]
+            found = ThreatSolver.line_threats(bytes(cells[start:start + length * step:step]), player)
+            if found == no_threats:
+                continue
+            for k in found[ThreatSolver.WINS]:
+                wins.add(start + k * step)
+            if wins_only:
+                continue
+            for k in found[ThreatSolver.FOURS]:
+                fours.add(start + k * step)
+            for k in found[ThreatSolver.CAPTURES]:
+                i = start + k * step
+                captures[i] = captures.get(i, 0) + 1
+            for k in found[ThreatSolver.CAPTURE_THREATS]:
+                threats.add(start + k * step)
+        for i, pairs in captures.items():
+            if total + pairs >= 5:
+                wins.add(i)
+        return wins, fours, captures, threats
+    
+    def _timed_moves(self, moves):
+        """Pass moves through, adding the time spent producing them to the stats."""
+        stats = self.stats
+        while True:
+            start = time.perf_counter()
+            move = next(moves, None)
+            stats.time_move_generation += time.perf_counter() - start
+            if move is None:
+                return
+            yield move
     
     def _evaluate_state(self, game_state):
         winner = game_state.get_winner()
         if winner == self.player:
-            return 100000
+            return self.WIN_SCORE
         elif winner is not None:
-            return -100000
+            return -self.WIN_SCORE
         elif game_state.game_over:
             return 0
-        return HeuristicEvaluator.evaluate(game_state, self.player)
\ No newline at end of file
+        return HeuristicEvaluator.evaluate(game_state, self.player)
+
+
+class MCTSNode:
+    """One position in the MCTS tree, reached by move.
+    
+    wins counts results for the player who played move (half a win for a
+    draw), so a parent picks the child with the best wins/visits.
+    untried holds the moves not expanded yet, best-ordered last.
+    """
+    __slots__ = ('move', 'parent', 'player', 'children', 'untried', 'visits', 'wins')
+    
+    def __init__(self, move, parent, player):
+        self.move = move
+        self.parent = parent
+        self.player = player
+        self.children = []
+        self.untried = None  # filled in on the first visit
+        self.visits = 0
+        self.wins = 0.0
+    
+    def best_child(self):
+        return max(self.children, key=lambda child: child.visits) if self.children else None
+
+
+class MCTSAI:
+    """Monte Carlo tree search engine with the same interface as MinimaxAI.
+    
+    Nodes are picked by UCT. A node's children are added best move first,
+    in MoveOrderer's order: wins, blocks, captures, then the one-ply score.
+    Playouts run in place on one GameState with make/undo. They take an
+    immediate five or block one when there is a four on the board, and
+    otherwise mostly play next to the last two moves. After ROLLOUT_PLIES
+    the heuristic evaluation, squashed to 0..1, stands in for the result.
+    The tree is kept between moves and re-rooted at the new position.
+    """
+    EXPLORATION = 0.7
+    MAX_CHILDREN = 30  # widest a node is ever expanded
+    ROLLOUT_PLIES = 20
+    LOCAL_PLAY = 0.8  # share of playout moves played next to the last two moves
+    EVAL_SCALE = 200.0
+    MAX_TREE_NODES = 300000
+    
+    def __init__(self, player, max_depth=2, time_limit=2.0, candidate_radius=None, seed=None, profile=False):
+        self.player = player
+        self.max_depth = max_depth  # unused; kept so callers can treat both engines alike
+        self.time_limit = time_limit
+        self.candidate_radius = candidate_radius
+        self.profile = profile
+        self.rng = random.Random(seed)
+        self.orderer = MoveOrderer()
+        self.nodes_evaluated = 0  # playouts in the latest search
+        self.completed_depth = 0  # deepest tree node reached
+        self.principal_variation = []
+        self.start_time = None
+        self.deadline = None
+        self.stop_requested = False
+        self._root = None
+        self._root_hash = None
+        self._root_history = 0
+        self._tree_nodes = 0
+        self._reused_visits = 0
+    
+    def stop(self):
+        self.stop_requested = True
+    
+    def close(self):
+        self._root = None
+    
+    def ponderhit(self):
+        self.deadline = time.time() + self.time_limit
+    
+    def predict_reply(self, game_state):
+        """The most visited reply in the tree, or the best-ordered move if it has none."""
+        if game_state.game_over:
+            return None
+        node = self._find_node(game_state)
+        if node is not None and node.children:
+            return node.best_child().move
+        state = game_state.clone()
+        moves = state.get_valid_moves()
+        if not moves:
+            return None
+        scorer = VectorEvaluator if np is not None else HeuristicEvaluator
+        return self.orderer.order(state, moves, 0, None, scorer.score_moves(state, state.current_player, moves))[0]
+    
+    def _find_node(self, game_state):
+        """The tree node for game_state, if it descends from the kept root."""
+        if self._root is None or len(game_state.move_history) < self._root_history:
+            return None
+        state = game_state.clone()
+        played = []
+        while len(state.move_history) > self._root_history:
+            record = state.move_history[-1]
+            played.append((record.row, record.col))
+            state.undo_move()
+        if state.hash != self._root_hash:
+            return None
+        node = self._root
+        for move in reversed(played):
+            node = next((child for child in node.children if child.move == move), None)
+            if node is None:
+                return None
+        return node
+    
+    def get_best_move(self, game_state, exclude=(), ponder=False):
+        """Run playouts until time_limit runs out and return the most visited move."""
+        self.nodes_evaluated = 0
+        self.completed_depth = 0
+        self.principal_variation = []
+        self.start_time = time.time()
+        self.deadline = float('inf') if ponder else self.start_time + self.time_limit
+        self.stop_requested = False
+        
+        if len(game_state.move_history) == 0 and not exclude:
+            center = game_state.BOARD_SIZE // 2
+            return (center, center)
+        
+        state = game_state.clone()
+        if self.candidate_radius is not None and self.candidate_radius != state.candidate_radius:
+            state.set_candidate_radius(self.candidate_radius)
+        
+        root = None if exclude else self._find_node(state)
+        if root is None:
+            root = MCTSNode(None, None, GameState.BLACK if state.current_player == GameState.WHITE else GameState.WHITE)
+            scorer = VectorEvaluator if np is not None else HeuristicEvaluator
+            moves = [move for move in state.get_valid_moves() if move not in exclude]
+            self._expand(state, root, exclude, scorer.score_moves(state, state.current_player, moves))
+        root.parent = None  # let the rest of the old tree go
+        self._root = root
+        self._root_hash = state.hash
+        self._root_history = len(state.move_history)
+        self._reused_visits = root.visits
+        self._tree_nodes = self._count_nodes(root)
+        if not root.untried and not root.children:
+            return None
+        
+        while not self.stop_requested and time.time() < self.deadline and self._tree_nodes < self.MAX_TREE_NODES:
+            self._iterate(state, root)
+            self.nodes_evaluated += 1
+        
+        node = root
+        while node is not None and node.children:
+            node = node.best_child()
+            self.principal_variation.append(node.move)
+        if not root.children:
+            return root.untried[-1]
+        return root.best_child().move
+    
+    def _expand(self, state, node, exclude=(), scores=None):
+        """Fill in node.untried for the position in state.
+        
+        Within an ordering tier, moves next to the last move and among
+        many stones come first, unless scores are given.
+        """
+        if node.untried is not None:
+            return
+        if state.game_over:
+            node.untried = []
+            return
+        moves = [move for move in state.get_valid_moves() if move not in exclude]
+        if scores is None and state.last_move is not None:
+            last_row, last_col = state.last_move
+            counts = state.neighbor_counts
+            scores = {(row, col): counts[GameState.index(row, col)] - max(abs(row - last_row), abs(col - last_col))
+                      for row, col in moves}
+        ordered = self.orderer.order(state, moves, 0, None, scores)[:self.MAX_CHILDREN]
+        ordered.reverse()
+        node.untried = ordered
+    
+    @staticmethod
+    def _count_nodes(root):
+        count = 0
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.children)
+        return count
+    
+    def _iterate(self, state, root):
+        """One selection, expansion, playout and backup; state is left as it was."""
+        node = root
+        depth = 0
+        log_cache = {}
+        
+        # Selection: descend through fully expanded nodes by UCT
+        while not node.untried and node.children:
+            parent_visits = node.visits
+            log_visits = log_cache.get(parent_visits)
+            if log_visits is None:
+                log_visits = log_cache[parent_visits] = math.log(parent_visits)
+            exploration = self.EXPLORATION
+            node = max(node.children, key=lambda child: child.wins / child.visits +
+                       exploration * math.sqrt(log_visits / child.visits))
+            state.make_move(node.move[0], node.move[1])
+            depth += 1
+        
+        # Expansion: add the best untried move
+        if node.untried:
+            move = node.untried.pop()
+            child = MCTSNode(move, node, state.current_player)
+            node.children.append(child)
+            self._tree_nodes += 1
+            state.make_move(move[0], move[1])
+            depth += 1
+            node = child
+            self._expand(state, node)
+        self.completed_depth = max(self.completed_depth, depth)
+        
+        black_result = self._playout(state)
+        for _ in range(depth):
+            state.undo_move()
+        
+        while node is not None:
+            node.visits += 1
+            node.wins += black_result if node.player == GameState.BLACK else 1.0 - black_result
+            node = node.parent
+    
+    def _playout(self, state):
+        """Play quick moves from state and return Black's result between 0 and 1; state is restored."""
+        plies = 0
+        while not state.game_over and plies < self.ROLLOUT_PLIES:
+            index = self._playout_move(state)
+            if index is None:
+                break
+            row, col = GameState.coords(index)
+            state.make_move(row, col)
+            plies += 1
+        
+        if state.game_over:
+            result = 0.5 if state.winner is None else float(state.winner == GameState.BLACK)
+        else:
+            score = HeuristicEvaluator.evaluate(state, GameState.BLACK)
+            result = 1.0 / (1.0 + math.exp(-max(-50.0, min(50.0, score / self.EVAL_SCALE))))
+        for _ in range(plies):
+            state.undo_move()
+        return result
+    
+    def _playout_move(self, state):
+        """Cell index for the next playout move: win, block, nearby or anywhere."""
+        cells = state.cells
+        player = state.current_player
+        opponent = GameState.BLACK if player == GameState.WHITE else GameState.WHITE
+        near = []
+        for record in state.move_history[-2:]:
+            for i in state.neighborhood[GameState.index(record.row, record.col)]:
+                if cells[i] == GameState.EMPTY:
+                    near.append(i)
+        
+        fours = (GameState.CLOSED_FOUR, GameState.OPEN_FOUR)
+        for side in (player, opponent):
+            counts = state.pattern_counts[side]
+            if counts[fours[0]] or counts[fours[1]]:
+                for i in near:
+                    row, col = GameState.coords(i)
+                    if state.makes_five(row, col, side):
+                        return i
+        
+        if near and self.rng.random() < self.LOCAL_PLAY:
+            return self.rng.choice(near)
+        if state.candidates:
+            return self.rng.choice(tuple(state.candidates))
+        return None
+    
+    def search_stats(self):
+        root = self._root
+        wins = None
+        if root is not None and root.children:
+            best = root.best_child()
+            wins = best.wins / best.visits
+        return {
+            "engine": "mcts",
+            "nodes": self.nodes_evaluated,
+            "completed_depth": self.completed_depth,
+            "elapsed": time.time() - self.start_time if self.start_time is not None else 0.0,
+            "principal_variation": list(self.principal_variation),
+            "tree_nodes": self._tree_nodes,
+            "root_visits": root.visits if root is not None else 0,
+            "reused_visits": self._reused_visits,
+            "win_rate": wins,
+        }
+
+
+class BackgroundSearch(threading.Thread):
+    """Runs ai.get_best_move on a copy of a position in a daemon thread.
+    
+    on_done(search, move) is called from the search thread when it
+    finishes, unless the search was cancelled. move_now() cuts the search
+    short and still reports a move; cancel() cuts it short and reports
+    nothing. A ponder search runs without a deadline until ponderhit().
+    """
+    
+    def __init__(self, ai, game_state, on_done, ponder=False):
+        super().__init__(daemon=True)
+        self.ai = ai
+        self.game_state = game_state.clone()
+        self.on_done = on_done
+        self.ponder = ponder
+        self.cancelled = False
+        self.move = None
+        self.elapsed = 0.0
+    
+    def run(self):
+        start_time = time.time()
+        self.move = self.ai.get_best_move(self.game_state, ponder=self.ponder)
+        self.elapsed = time.time() - start_time
+        if not self.cancelled:
+            self.on_done(self, self.move)
+    
+    def ponderhit(self):
+        self.ponder = False
+        self.ai.ponderhit()
+    
+    def move_now(self):
+        self.ai.stop()
+    
+    def cancel(self):
+        self.cancelled = True
+        self.ai.stop()
+
+
+# Per-process state for root-parallel search workers
+_worker_ai = None
+_worker_root_bound = None
+_worker_search_id = None
+
+
+def _init_search_worker(player, tt_size_bits, root_bound, profile, quiescence_depth):
+    global _worker_ai, _worker_root_bound
+    _worker_ai = MinimaxAI(player, tt_size_bits=tt_size_bits, profile=profile, quiescence_depth=quiescence_depth)
+    _worker_ai._control = root_bound.get_obj()  # read without the lock at every interior node
+    _worker_root_bound = root_bound
+
+
+def _search_root_move(state, move, depth, search_id, iteration):
+    """Search one root move; returns (move, score or None on timeout, exact, nodes, stats).
+    
+    exact is False when the score failed low against the shared bound and
+    is therefore only an upper bound.
+    """
+    global _worker_search_id
+    ai = _worker_ai
+    ai.nodes_evaluated = 0
+    ai.stats = SearchStats()
+    # Stop and the deadline come from the parent through the shared array
+    ai.deadline = float('inf')
+    ai.stop_requested = False
+    ai._iteration = iteration
+    if ai._out_of_time():
+        return move, None, False, 0, ai.stats
+    if search_id != _worker_search_id:
+        _worker_search_id = search_id
+        ai.tt.new_search()
+        ai.orderer.new_search()
+    
+    # Start from the best score any worker has proved at this iteration
+    with _worker_root_bound.get_lock():
+        alpha = _worker_root_bound[1] if _worker_root_bound[0] == iteration else float('-inf')
+    
+    state.make_move(move[0], move[1])
+    try:
+        score = -ai._negamax(state, depth - 1, float('-inf'), -alpha, 1)
+    except SearchTimeout:
+        return move, None, False, ai.nodes_evaluated, ai.stats
+    
+    with _worker_root_bound.get_lock():
+        if _worker_root_bound[0] == iteration and score > _worker_root_bound[1]:
+            _worker_root_bound[1] = score
+    return move, score, score > alpha, ai.nodes_evaluated, ai.stats
@@ -0,0 +1,448 @@
+"""Fixed-position search benchmark for MinimaxAI.
+
+Every position in bench_positions.json is replayed from its move list and
+searched to a fixed depth with no time limit. The report shows nodes,
+nodes/sec, time to reach each depth, and whether the chosen move is one
+of the expected answers.
+
+    python benchmark.py                          # report only
+    python benchmark.py --save-baseline base.json
+    python benchmark.py --baseline base.json     # exit 1 if nodes/sec dropped too far
+    python benchmark.py --check-numpy            # NumPy evaluator must match the scalar one
+    python benchmark.py --check-state            # incremental GameState must match a rebuild
+    python benchmark.py --check-solver           # solver wins must hold against every defence
+    python benchmark.py --check-ponder           # ponderhit after a book or cache answer
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from game_state import GameState
+from ai_logic import MinimaxAI, HeuristicEvaluator, VectorEvaluator, ThreatSolver, np
+
+DEFAULT_POSITIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_positions.json")
+
+
+def load_positions(path=DEFAULT_POSITIONS):
+    with open(path) as f:
+        return json.load(f)
+
+
+def build_state(moves):
+    state = GameState()
+    for row, col in moves:
+        if not state.make_move(row, col):
+            raise ValueError(f"illegal move {(row, col)} in benchmark position")
+    return state
+
+
+def run_position(position, depth=None, repeat=1):
+    """Search one position and return its measurements (best of repeat runs)."""
+    depth = depth or position["depth"]
+    best = None
+    for _ in range(repeat):
+        state = build_state(position["moves"])
+        ai = MinimaxAI(state.current_player, max_depth=depth, time_limit=float('inf'))
+        start = time.time()
+        move = ai.get_best_move(state)
+        elapsed = time.time() - start
+        if best is None or elapsed < best["time"]:
+            best = {
+                "name": position["name"],
+                "category": position.get("category", ""),
+                "depth": depth,
+                "move": list(move),
+                "nodes": ai.nodes_evaluated,
+                "time": elapsed,
+                "nps": ai.nodes_evaluated / elapsed if elapsed > 0 else 0.0,
+                "time_to_depth": {d: round(t, 4) for d, t, _, _, _ in ai.iteration_log},
+            }
+    expected = position.get("expected")
+    best["expected"] = expected
+    best["agrees"] = None if expected is None else best["move"] in expected
+    return best
+
+
+def run_suite(positions, depth=None, repeat=1):
+    results = [run_position(position, depth, repeat) for position in positions]
+    total_nodes = sum(r["nodes"] for r in results)
+    total_time = sum(r["time"] for r in results)
+    checked = [r for r in results if r["agrees"] is not None]
+    return {
+        "results": results,
+        "nodes": total_nodes,
+        "time": total_time,
+        "nps": total_nodes / total_time if total_time > 0 else 0.0,
+        "agreement": sum(r["agrees"] for r in checked),
+        "checked": len(checked),
+    }
+
+
+def print_report(summary, out=sys.stdout):
+    print(f"{'position':<24}{'depth':>6}{'nodes':>10}{'time':>9}{'nodes/s':>10}  {'move':<10}{'ok':<5}time to depth", file=out)
+    for r in summary["results"]:
+        ok = "-" if r["agrees"] is None else "yes" if r["agrees"] else "NO"
+        ttd = " ".join(f"d{d}={t:.3f}" for d, t in r["time_to_depth"].items())
+        print(f"{r['name']:<24}{r['depth']:>6}{r['nodes']:>10}{r['time']:>9.3f}{r['nps']:>10.0f}  "
+              f"{str(tuple(r['move'])):<10}{ok:<5}{ttd}", file=out)
+    print(f"total: {summary['nodes']} nodes in {summary['time']:.3f}s = {summary['nps']:.0f} nodes/s, "
+          f"best move agreement {summary['agreement']}/{summary['checked']}", file=out)
+
+
+def make_baseline(summary):
+    return {
+        "nps": summary["nps"],
+        "positions": {r["name"]: {"nodes": r["nodes"], "time": r["time"]} for r in summary["results"]},
+    }
+
+
+def compare_to_baseline(summary, baseline, max_slowdown):
+    """Return a list of failure messages; empty when within the threshold.
+
+    Throughput is compared over the positions present in both runs, so a
+    filtered run is measured against the same subset of the baseline.
+    """
+    saved = baseline["positions"]
+    common = [r for r in summary["results"] if r["name"] in saved]
+    if not common:
+        return ["no positions in common with the baseline"]
+    base_time = sum(saved[r["name"]]["time"] for r in common)
+    base_nps = sum(saved[r["name"]]["nodes"] for r in common) / base_time if base_time > 0 else 0.0
+    run_time = sum(r["time"] for r in common)
+    run_nps = sum(r["nodes"] for r in common) / run_time if run_time > 0 else 0.0
+
+    failures = []
+    floor = base_nps * (1 - max_slowdown)
+    if run_nps < floor:
+        failures.append(f"throughput {run_nps:.0f} nodes/s is below {floor:.0f} "
+                        f"({max_slowdown:.0%} under baseline {base_nps:.0f})")
+    return failures
+
+
+def check_numpy(positions, games=50, seed=0):
+    """Compare VectorEvaluator with HeuristicEvaluator on every benchmark
+    position and on the positions of random games; returns mismatch messages."""
+    states = [(p["name"], build_state(p["moves"])) for p in positions]
+    rng = random.Random(seed)
+    for game in range(games):
+        state = GameState()
+        for ply in range(rng.randint(1, 120)):
+            if state.game_over:
+                break
+            state.make_move(*rng.choice(state.get_valid_moves()))
+            states.append((f"random-{game}-{ply}", state.clone()))
+
+    failures = []
+    for name, state in states:
+        moves = state.get_valid_moves()
+        for player in (GameState.BLACK, GameState.WHITE):
+            scalar = HeuristicEvaluator.evaluate(state, player)
+            vector = VectorEvaluator.evaluate(state, player)
+            if scalar != vector:
+                failures.append(f"{name}: evaluate({player}) {vector} != {scalar}")
+            scalar = HeuristicEvaluator.score_moves(state, player, moves)
+            vector = VectorEvaluator.score_moves(state, player, moves)
+            wrong = [move for move in moves if scalar[move] != vector[move]]
+            if wrong:
+                failures.append(f"{name}: score_moves({player}) differs at {wrong[:5]}")
+    return failures, len(states)
+
+
+def state_snapshot(state):
+    """Everything make_move and undo_move change, as comparable values."""
+    return (bytes(state.cells), state.current_player, dict(state.captures), state.last_move, state.game_over,
+            state.winner, len(state.move_history), state.empty_count, state.hash, state.symmetry_hash,
+            tuple(state.line_patterns), {p: list(c) for p, c in state.pattern_counts.items()},
+            {p: list(c) for p, c in state.center_counts.items()}, list(state.neighbor_counts),
+            set(state.candidates))
+
+
+def rebuild_mismatches(state):
+    """Names of the incrementally kept fields that differ from a rebuild from the cells."""
+    cells = state.cells
+    stones = [(i, stone) for i, stone in enumerate(cells) if stone in (GameState.BLACK, GameState.WHITE)]
+    wrong = []
+
+    key = GameState.ZOBRIST_CAPTURES[GameState.BLACK][state.captures[GameState.BLACK]]
+    key ^= GameState.ZOBRIST_CAPTURES[GameState.WHITE][state.captures[GameState.WHITE]]
+    if state.current_player == GameState.BLACK:
+        key ^= GameState.ZOBRIST_BLACK_TO_MOVE
+    symmetry = 0
+    for i, stone in stones:
+        key ^= GameState.ZOBRIST_STONES[stone][i]
+        symmetry ^= GameState.SYMMETRY_KEYS[stone][i]
+    if key != state.hash:
+        wrong.append("hash")
+    if symmetry != state.symmetry_hash:
+        wrong.append("symmetry_hash")
+
+    patterns = [state._scan_line(line) for line in range(len(GameState.LINES))]
+    if patterns != state.line_patterns:
+        wrong.append("line_patterns")
+    for side, player in enumerate((GameState.BLACK, GameState.WHITE)):
+        counts = [sum(line[side][kind] for line in patterns) for kind in range(GameState.PATTERN_KINDS)]
+        if counts != state.pattern_counts[player]:
+            wrong.append(f"pattern_counts[{player}]")
+        center = [0, 0, 0]
+        for i, stone in stones:
+            if stone == player and GameState.CENTER_RINGS[i] >= 0:
+                center[GameState.CENTER_RINGS[i]] += 1
+        if center != state.center_counts[player]:
+            wrong.append(f"center_counts[{player}]")
+
+    # set_candidate_radius rebuilds the candidate set from the cells alone
+    fresh = state.clone()
+    fresh.set_candidate_radius(state.candidate_radius)
+    if fresh.neighbor_counts != state.neighbor_counts:
+        wrong.append("neighbor_counts")
+    if fresh.candidates != state.candidates:
+        wrong.append("candidates")
+    if cells.count(GameState.EMPTY) != state.empty_count:
+        wrong.append("empty_count")
+    return wrong
+
+
+def check_state(games=200, seed=0):
+    """Play random games, checking after every move that the incremental
+    state matches a rebuild from the cells and that undo_move restores a
+    full snapshot; returns (mismatch messages, moves checked)."""
+    rng = random.Random(seed)
+    failures = []
+    moves = 0
+    for game in range(games):
+        state = GameState(candidate_radius=rng.choice((1, 2, 3)))
+        snapshots = []
+        while not state.game_over and len(state.move_history) < rng.randint(20, 200):
+            before = state_snapshot(state)
+            move = rng.choice(state.get_valid_moves())
+            state.make_move(*move)
+            moves += 1
+            name = f"game {game} ply {len(snapshots)} {move}"
+            failures += [f"{name}: {field} after make_move" for field in rebuild_mismatches(state)]
+
+            # Undo and redo each move before going on
+            state.undo_move()
+            if state_snapshot(state) != before:
+                failures.append(f"{name}: undo_move did not restore the position")
+            state.make_move(*move)
+            snapshots.append(before)
+
+        # Then take the whole game back
+        while snapshots:
+            state.undo_move()
+            if state_snapshot(state) != snapshots.pop():
+                failures.append(f"game {game} ply {len(snapshots)}: undo_move did not restore the position")
+                break
+    return failures, moves
+
+
+def forced_win(state, attacker, moves_left, hints=None):
+    """True if attacker, to move, wins within moves_left moves against every reply.
+    
+    The attacker plays the solver's move, or first the move that worked at
+    the same depth after an earlier reply (hints, by moves left).
+    """
+    hints = {} if hints is None else hints
+    hint = hints.get(moves_left)
+    if hint is not None and state.is_valid_move(*hint) and _wins_after(state, hint, attacker, moves_left, hints):
+        return True
+    move = ThreatSolver(moves_left).solve(state)
+    if move is None or move == hint or not _wins_after(state, move, attacker, moves_left, hints):
+        return False
+    hints[moves_left] = move
+    return True
+
+
+def _wins_after(state, move, attacker, moves_left, hints):
+    """True if attacker wins after playing move, whatever the defender replies."""
+    state.make_move(*move)
+    try:
+        if state.game_over:
+            return state.winner == attacker
+        defender = state.current_player
+        cells = [GameState.coords(i) for i in state.candidates]
+        fives = [cell for cell in cells if state.makes_five(*cell, attacker)]
+        wins = [cell for cell in cells if state.is_winning_move(*cell, attacker)]
+        # Wins and captures need a stone next to them, so only candidates can hold them
+        forcing = {cell for cell in cells
+                   if state.is_winning_move(*cell, defender) or state.capture_count(*cell, defender)}
+        for row in range(GameState.BOARD_SIZE):
+            for col in range(GameState.BOARD_SIZE):
+                if not state.is_valid_move(row, col):
+                    continue
+                # A reply that neither wins nor captures only fills its own
+                # cell, so any other five stays open
+                if (row, col) not in forcing and (len(fives) > 1 or fives and fives[0] != (row, col)):
+                    continue
+                state.make_move(row, col)
+                if state.game_over:
+                    won = False
+                elif any(state.is_valid_move(*cell) and state.is_winning_move(*cell, attacker) for cell in wins):
+                    won = True
+                else:
+                    won = moves_left > 1 and forced_win(state, attacker, moves_left - 1, hints)
+                state.undo_move()
+                if not won:
+                    return False
+        return True
+    finally:
+        state.undo_move()
+
+
+def check_solver(positions, games=40, seed=0, threat_depth=4, scan_nodes=500):
+    """Play out the wins ThreatSolver claims against every legal reply: on
+    the benchmark positions and at the first claimed win of each random
+    game. Claims are looked for with scan_nodes solver nodes per position.
+    Returns (refuted claims, wins checked)."""
+    claims = []
+    for position in positions:
+        state = build_state(position["moves"])
+        if not state.game_over:
+            move = ThreatSolver(threat_depth, max_nodes=scan_nodes).solve(state)
+            claims.append((position["name"], state, move))
+    rng = random.Random(seed)
+    for game in range(games):
+        state = GameState()
+        for ply in range(200):
+            state.make_move(*rng.choice(state.get_valid_moves()))
+            if state.game_over:
+                break
+            move = ThreatSolver(threat_depth, max_nodes=scan_nodes).solve(state)
+            if move is not None:
+                claims.append((f"random-{game}-{ply}", state, move))
+                break
+
+    failures = []
+    checked = 0
+    for name, state, move in claims:
+        if move is None:
+            continue
+        checked += 1
+        if not _wins_after(state, move, state.current_player, threat_depth, {}):
+            failures.append(f"{name}: claimed win {move} is refuted")
+    return failures, checked
+
+
+def check_ponderhit():
+    """Ponder on positions answered from an opening book and from the search
+    cache without running the solver, then call ponderhit(); returns failure messages."""
+    from opening_book import BookBuilder
+
+    failures = []
+    state = build_state([(9, 9), (9, 10)])
+    with tempfile.TemporaryDirectory() as folder:
+        book_file = os.path.join(folder, "book.bin")
+        builder = BookBuilder()
+        builder.add(state, (10, 10))
+        builder.write(book_file)
+        cache_file = os.path.join(folder, "cache.bin")
+        ai = MinimaxAI(state.current_player, max_depth=2, time_limit=float('inf'), cache_file=cache_file)
+        ai.get_best_move(state)
+        ai.close()
+
+        for source, options in (("book", {"book": book_file}), ("cache", {"cache_file": cache_file})):
+            ai = MinimaxAI(state.current_player, max_depth=2, time_limit=1.0, **options)
+            try:
+                move = ai.get_best_move(state, ponder=True)
+                if ai.nodes_evaluated:
+                    failures.append(f"{source}: the position was searched, not answered from the {source}")
+                ai.ponderhit()
+                if move is None:
+                    failures.append(f"{source}: no move")
+            except Exception as error:
+                failures.append(f"{source}: ponderhit raised {error!r}")
+            finally:
+                if ai.book is not None:
+                    ai.book.close()
+                ai.close()
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark MinimaxAI on fixed positions.")
+    parser.add_argument("--positions", default=DEFAULT_POSITIONS)
+    parser.add_argument("--depth", type=int, default=None, help="override every position's depth")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per position; the fastest is kept")
+    parser.add_argument("--only", default=None, help="run positions whose name contains this text")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH")
+    parser.add_argument("--max-slowdown", type=float, default=0.10,
+                        help="allowed nodes/s drop against the baseline (fraction)")
+    parser.add_argument("--strict", action="store_true", help="also fail on best-move disagreement")
+    parser.add_argument("--check-numpy", action="store_true",
+                        help="check the NumPy evaluator against the scalar one instead of timing")
+    parser.add_argument("--check-state", action="store_true",
+                        help="check incremental GameState updates and undo against rebuilds instead of timing")
+    parser.add_argument("--check-solver", action="store_true",
+                        help="play out the threat solver's wins against every defence instead of timing")
+    parser.add_argument("--check-ponder", action="store_true",
+                        help="check ponderhit after moves answered from a book or the cache instead of timing")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    positions = load_positions(args.positions)
+    if args.only:
+        positions = [p for p in positions if args.only in p["name"]]
+
+    if args.check_numpy:
+        if np is None:
+            print("FAIL: NumPy is not installed", file=sys.stderr)
+            return 1
+        failures, checked = check_numpy(positions)
+        for failure in failures:
+            print(f"FAIL: {failure}", file=sys.stderr)
+        print(f"checked {checked} positions, {len(failures)} mismatches")
+        return 1 if failures else 0
+
+    if args.check_state:
+        failures, checked = check_state()
+        for failure in failures:
+            print(f"FAIL: {failure}", file=sys.stderr)
+        print(f"checked {checked} moves, {len(failures)} mismatches")
+        return 1 if failures else 0
+
+    if args.check_solver:
+        failures, checked = check_solver(positions)
+        for failure in failures:
+            print(f"FAIL: {failure}", file=sys.stderr)
+        print(f"checked {checked} solver wins, {len(failures)} refuted")
+        return 1 if failures else 0
+
+    if args.check_ponder:
+        failures = check_ponderhit()
+        for failure in failures:
+            print(f"FAIL: {failure}", file=sys.stderr)
+        print(f"checked ponderhit after book and cache answers, {len(failures)} failures")
+        return 1 if failures else 0
+
+    summary = run_suite(positions, args.depth, args.repeat)
+    if args.json:
+        json.dump(summary, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(summary)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(make_baseline(summary), f, indent=2)
+
+    failures = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures += compare_to_baseline(summary, json.load(f), args.max_slowdown)
+    if args.strict and summary["agreement"] < summary["checked"]:
+        failures.append(f"best move agreement {summary['agreement']}/{summary['checked']}")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""Compact binary game records: streaming writer, random-access reader, bulk replay.
+
+A file holds many games back to back, then an index of where each game
+starts, so any game can be read without scanning the ones before it:
+
+    header  magic, game count, index offset
+    game    move count, winner, capture count, random opening plies,
+            moves (uint16 cell index row * 19 + col each),
+            captures ((ply, direction bitmask) for each move that captured)
+    index   one uint64 file offset per game
+
+361 cells do not fit in a byte, so a move takes two. Capturing moves are
+rare, so captures are listed separately rather than widening every move.
+Bit d of a capture mask is set when the move took the pair in direction
+GameState.ALL_STEPS[d]. Replay recomputes captures, and verify=True
+checks them against the stored masks. The random opening plies are the
+moves selfplay.py --opening-moves played at random before the engines
+took over, so opening books can skip them.
+
+    python game_records.py --from-selfplay results.jsonl -o games.pgr
+    python game_records.py --replay games.pgr --processes 8
+"""
+import argparse
+import itertools
+import json
+import mmap
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from game_state import GameState
+
+MAGIC = b"PGR2"
+HEADER = struct.Struct("<4sQQ")  # magic, game count, index offset
+GAME = struct.Struct("<HBHH")  # move count, winner, capture count, random opening plies
+CAPTURE = struct.Struct("<HB")  # ply, direction bitmask
+OFFSET = struct.Struct("<Q")
+
+# Winner codes; GameState's own player numbers are used for black and white
+DRAW = 0
+UNFINISHED = 3
+
+_DIRECTIONS = {step: d for d, step in enumerate(GameState.ALL_STEPS)}
+
+
+def capture_mask(record):
+    """Direction bitmask of the pairs a GameState MoveRecord captured."""
+    mask = 0
+    index = GameState.index(record.row, record.col)
+    for r, c in record.captured[::2]:
+        mask |= 1 << _DIRECTIONS[GameState.index(r, c) - index]
+    return mask
+
+
+class GameRecord:
+    __slots__ = ('moves', 'winner', 'captures', 'opening')
+
+    def __init__(self, moves, winner, captures, opening=0):
+        self.moves = moves  # (row, col) tuples
+        self.winner = winner  # GameState.BLACK/WHITE, DRAW or UNFINISHED
+        self.captures = captures  # {ply: direction bitmask}
+        self.opening = opening  # leading moves played at random, not by an engine
+
+    def replay(self, verify=False):
+        """Play the game through a GameState and return it."""
+        state = GameState()
+        for ply, (row, col) in enumerate(self.moves):
+            if not state.make_move(row, col):
+                raise ValueError(f"illegal move {(row, col)} at ply {ply}")
+            if verify and capture_mask(state.move_history[-1]) != self.captures.get(ply, 0):
+                raise ValueError(f"captures at ply {ply} do not match the record")
+        return state
+
+
+class GameWriter:
+    """Appends games to a record file; the index is written by close()."""
+
+    def __init__(self, path):
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, 0, 0))
+        self._offsets = array("Q")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def write(self, moves, winner, captures=None, opening=0):
+        """Append one game: (row, col) moves, a winner code, {ply: capture mask} and random opening plies."""
+        captures = captures or {}
+        cells = array("H", (row * GameState.BOARD_SIZE + col for row, col in moves))
+        self._offsets.append(self._file.tell())
+        self._file.write(GAME.pack(len(cells), winner, len(captures), opening))
+        self._file.write(cells.tobytes())
+        for ply in sorted(captures):
+            self._file.write(CAPTURE.pack(ply, captures[ply]))
+
+    def write_state(self, state, opening=0):
+        """Append the game played so far in a GameState."""
+        moves = []
+        captures = {}
+        for ply, record in enumerate(state.move_history):
+            moves.append((record.row, record.col))
+            if record.captured:
+                captures[ply] = capture_mask(record)
+        if not state.game_over:
+            winner = UNFINISHED
+        else:
+            winner = DRAW if state.winner is None else state.winner
+        self.write(moves, winner, captures, opening)
+
+    def close(self):
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        self._file.write(self._offsets.tobytes())
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, len(self._offsets), index_offset))
+        self._file.close()
+
+
+class GameReader:
+    """Memory-mapped, random-access view of a record file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a game record file")
+        self._offsets = array("Q")
+        self._offsets.frombytes(self._map[index_offset:index_offset + self.count * OFFSET.size])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        offset = self._offsets[i]
+        move_count, winner, capture_count, opening = GAME.unpack_from(self._map, offset)
+        offset += GAME.size
+        cells = array("H")
+        cells.frombytes(self._map[offset:offset + 2 * move_count])
+        offset += 2 * move_count
+        captures = {}
+        for _ in range(capture_count):
+            ply, mask = CAPTURE.unpack_from(self._map, offset)
+            captures[ply] = mask
+            offset += CAPTURE.size
+        size = GameState.BOARD_SIZE
+        return GameRecord([divmod(cell, size) for cell in cells], winner, captures, opening)
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+
+def _replay_range(path, start, stop, verify):
+    """Replay games start..stop-1; returns (games, moves) played."""
+    moves = 0
+    with GameReader(path) as reader:
+        for i in range(start, stop):
+            record = reader[i]
+            record.replay(verify)
+            moves += len(record.moves)
+    return stop - start, moves
+
+
+def replay_all(path, processes=1, verify=False, chunk=1000):
+    """Replay every game in a file, split by index range across processes; returns (games, moves)."""
+    with GameReader(path) as reader:
+        count = len(reader)
+    ranges = [(start, min(start + chunk, count)) for start in range(0, count, chunk)]
+    if processes <= 1:
+        results = [_replay_range(path, start, stop, verify) for start, stop in ranges]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(_replay_range, *zip(*[(path, start, stop, verify) for start, stop in ranges])))
+    return sum(games for games, _ in results), sum(moves for _, moves in results)
+
+
+def convert_selfplay(paths, output):
+    """Write the games of selfplay.py JSONL files to a record file; returns the game count."""
+    with GameWriter(output) as writer:
+        for path in paths:
+            with open(path) as f:
+                for line in f:
+                    moves = json.loads(line)["moves"]
+                    state = GameState()
+                    for move in moves:
+                        state.make_move(*move["move"])
+                    opening = sum(1 for _ in itertools.takewhile(lambda move: move.get("random"), moves))
+                    writer.write_state(state, opening)
+        return len(writer)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert and replay binary Pente game records.")
+    parser.add_argument("--from-selfplay", nargs="*", default=[], help="selfplay.py JSONL files to convert")
+    parser.add_argument("-o", "--output", default="games.pgr")
+    parser.add_argument("--replay", help="record file to replay through GameState")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--verify", action="store_true", help="check replayed captures against the record")
+    args = parser.parse_args(argv)
+
+    if args.from_selfplay:
+        count = convert_selfplay(args.from_selfplay, args.output)
+        print(f"wrote {count} games to {args.output}", file=sys.stderr)
+    if args.replay:
+        start = time.time()
+        games, moves = replay_all(args.replay, args.processes, args.verify)
+        elapsed = time.time() - start
+        print(f"replayed {games} games ({moves} moves) in {elapsed:.2f}s = "
+              f"{moves / elapsed if elapsed > 0 else 0:.0f} moves/s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
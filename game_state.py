@@ -1,64 +1,269 @@
+import random
+import re
+
+
+def _zobrist_keys(rng, count):
+    return [rng.getrandbits(64) for _ in range(count)]
+
+
+def _build_symmetries(size, stride):
+    """Index maps for the 8 board symmetries (rotations and reflections).
+    
+    SYMMETRY_MAPS[t][index] is where the cell at index lands under
+    transform t; border cells map to themselves.
+    """
+    n = size - 1
+    transforms = (
+        lambda r, c: (r, c),
+        lambda r, c: (c, n - r),
+        lambda r, c: (n - r, n - c),
+        lambda r, c: (n - c, r),
+        lambda r, c: (r, n - c),
+        lambda r, c: (n - r, c),
+        lambda r, c: (c, r),
+        lambda r, c: (n - c, n - r),
+    )
+    maps = []
+    for transform in transforms:
+        table = list(range(stride * stride))
+        for row in range(size):
+            for col in range(size):
+                r, c = transform(row, col)
+                table[(row + 1) * stride + col + 1] = (r + 1) * stride + c + 1
+        maps.append(table)
+    return maps
+
+
+def _symmetry_keys(stone_keys, maps):
+    """Pack the 8 symmetric images of each cell's key into one 512-bit int.
+    
+    Bits 64*t .. 64*t+63 of entry index hold the key of the cell index
+    maps to under transform t, so one XOR updates all 8 hashes at once.
+    """
+    return [sum(stone_keys[table[i]] << (64 * t) for t, table in enumerate(maps))
+            for i in range(len(stone_keys))]
+
+
+def _build_lines(size, stride, directions):
+    """Enumerate every board line as (first index, step, length).
+    
+    Also returns, per direction, a table mapping a cell index to the id of
+    the line through it in that direction (-1 for border cells).
+    """
+    lines = []
+    line_ids = []
+    for dr, dc in directions:
+        ids = [-1] * (stride * stride)
+        for row in range(size):
+            for col in range(size):
+                if 0 <= row - dr < size and 0 <= col - dc < size:
+                    continue  # not the first cell of its line
+                length = 0
+                r, c = row, col
+                while 0 <= r < size and 0 <= c < size:
+                    ids[(r + 1) * stride + c + 1] = len(lines)
+                    length += 1
+                    r += dr
+                    c += dc
+                lines.append(((row + 1) * stride + col + 1, dr * stride + dc, length))
+        line_ids.append(ids)
+    return lines, line_ids
+
+
+class MoveRecord:
+    """One played move and everything undo_move needs to take it back.
+    
+    captured holds the (row, col) of the stones the move took; hash,
+    symmetry_hash, game_over, winner and last_move are the values from
+    before the move.
+    """
+    __slots__ = ('row', 'col', 'player', 'captured', 'hash', 'symmetry_hash', 'game_over', 'winner', 'last_move')
+    
+    def __init__(self, row, col, player, captured, hash, symmetry_hash, game_over, winner, last_move):
+        self.row = row
+        self.col = col
+        self.player = player
+        self.captured = captured
+        self.hash = hash
+        self.symmetry_hash = symmetry_hash
+        self.game_over = game_over
+        self.winner = winner
+        self.last_move = last_move
+    
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+    
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+
 class GameState:
     BOARD_SIZE = 19
     EMPTY = 0
     BLACK = 1
     WHITE = 2
+    OFFBOARD = 3
+    
+    # The board is a flat bytearray with a one-cell border of OFFBOARD
+    # sentinels, so walking along a line stops at the edge without any
+    # bounds checks. Cell (row, col) lives at index (row + 1) * STRIDE + col + 1.
+    STRIDE = BOARD_SIZE + 2
+    LINE_STEPS = (1, STRIDE + 1, STRIDE, STRIDE - 1)  # (0,1), (1,1), (1,0), (1,-1)
+    ALL_STEPS = LINE_STEPS + tuple(-step for step in LINE_STEPS)
+    
+    # Zobrist keys, seeded so hashes are stable across runs and processes.
+    # Capture counts are part of the key since they decide capture wins.
+    _zobrist_rng = random.Random(0x50E7E)
+    ZOBRIST_STONES = (None, _zobrist_keys(_zobrist_rng, STRIDE * STRIDE), _zobrist_keys(_zobrist_rng, STRIDE * STRIDE))
+    ZOBRIST_CAPTURES = (None, _zobrist_keys(_zobrist_rng, 16), _zobrist_keys(_zobrist_rng, 16))
+    ZOBRIST_BLACK_TO_MOVE = _zobrist_rng.getrandbits(64)
+    
+    # Line patterns are counted per color and kept up to date incrementally:
+    # a move only rescans the lines through the cells it changed.
+    CLOSED_TWO, OPEN_TWO, CLOSED_THREE, OPEN_THREE, CLOSED_FOUR, OPEN_FOUR, FIVE, CAPTURE_THREAT = range(8)
+    PATTERN_KINDS = 8
+    LINES, LINE_IDS = _build_lines(BOARD_SIZE, STRIDE, ((0, 1), (1, 1), (1, 0), (1, -1)))
+    _RUN_PATTERNS = (None, re.compile(b'\x01+'), re.compile(b'\x02+'))
+    _CAPTURE_PATTERNS = (None, (b'\x01\x02\x02\x00', b'\x00\x02\x02\x01'), (b'\x02\x01\x01\x00', b'\x00\x01\x01\x02'))
+    _EMPTY_LINE = ((0,) * PATTERN_KINDS, (0,) * PATTERN_KINDS)
+    
+    # Chebyshev distance from the centre for the 5x5 centre block, -1 elsewhere
+    CENTER_RINGS = [-1] * (STRIDE * STRIDE)
+    for _row in range(BOARD_SIZE // 2 - 2, BOARD_SIZE // 2 + 3):
+        for _col in range(BOARD_SIZE // 2 - 2, BOARD_SIZE // 2 + 3):
+            CENTER_RINGS[(_row + 1) * STRIDE + _col + 1] = max(abs(_row - BOARD_SIZE // 2), abs(_col - BOARD_SIZE // 2))
+    del _row, _col
+    
+    # Candidate moves are the empty cells within CANDIDATE_RADIUS of a stone
+    CANDIDATE_RADIUS = 3
+    _neighborhoods = {}
     
-    def __init__(self):
-        self.board = [[self.EMPTY for _ in range(self.BOARD_SIZE)] for _ in range(self.BOARD_SIZE)]
+    # The stone part of the hash is also kept for all 8 rotations and
+    # reflections of the board, packed into one int (see canonical_key)
+    SYMMETRY_MAPS = _build_symmetries(BOARD_SIZE, STRIDE)
+    INVERSE_SYMMETRY = (0, 3, 2, 1, 4, 5, 6, 7)
+    SYMMETRY_KEYS = (None, _symmetry_keys(ZOBRIST_STONES[BLACK], SYMMETRY_MAPS),
+                     _symmetry_keys(ZOBRIST_STONES[WHITE], SYMMETRY_MAPS))
+    _KEY_MASK = (1 << 64) - 1
+    
+    def __init__(self, candidate_radius=CANDIDATE_RADIUS):
+        self.cells = bytearray([self.OFFBOARD]) * (self.STRIDE * self.STRIDE)
+        for row in range(self.BOARD_SIZE):
+            start = (row + 1) * self.STRIDE + 1
+            self.cells[start:start + self.BOARD_SIZE] = bytes(self.BOARD_SIZE)
         self.current_player = self.WHITE  # Start with White as the human player
         self.captures = {self.BLACK: 0, self.WHITE: 0}
         self.last_move = None
         self.game_over = False
         self.winner = None
         self.move_history = []
+        self.empty_count = self.BOARD_SIZE * self.BOARD_SIZE
+        self.hash = self.ZOBRIST_CAPTURES[self.BLACK][0] ^ self.ZOBRIST_CAPTURES[self.WHITE][0]
+        self.symmetry_hash = 0
+        self.line_patterns = [self._EMPTY_LINE] * len(self.LINES)
+        self.pattern_counts = {self.BLACK: [0] * self.PATTERN_KINDS, self.WHITE: [0] * self.PATTERN_KINDS}
+        self.center_counts = {self.BLACK: [0, 0, 0], self.WHITE: [0, 0, 0]}
+        self.set_candidate_radius(candidate_radius)
+    
+    @classmethod
+    def index(cls, row, col):
+        return (row + 1) * cls.STRIDE + col + 1
+    
+    @classmethod
+    def coords(cls, index):
+        row, col = divmod(index, cls.STRIDE)
+        return (row - 1, col - 1)
+    
+    @property
+    def board(self):
+        """Row-major snapshot of the cells, for callers that index board[row][col]."""
+        rows = []
+        for row in range(self.BOARD_SIZE):
+            start = (row + 1) * self.STRIDE + 1
+            rows.append(list(self.cells[start:start + self.BOARD_SIZE]))
+        return rows
+    
+    def get_cell(self, row, col):
+        return self.cells[(row + 1) * self.STRIDE + col + 1]
+    
+    @classmethod
+    def _neighborhood(cls, radius):
+        """Per-cell lists of the on-board indices within radius (cached per radius)."""
+        if radius not in cls._neighborhoods:
+            table = [()] * (cls.STRIDE * cls.STRIDE)
+            for row in range(cls.BOARD_SIZE):
+                for col in range(cls.BOARD_SIZE):
+                    table[cls.index(row, col)] = tuple(
+                        cls.index(r, c)
+                        for r in range(max(0, row - radius), min(cls.BOARD_SIZE, row + radius + 1))
+                        for c in range(max(0, col - radius), min(cls.BOARD_SIZE, col + radius + 1))
+                        if (r, c) != (row, col))
+            cls._neighborhoods[radius] = table
+        return cls._neighborhoods[radius]
+    
+    def set_candidate_radius(self, radius):
+        """Change the candidate radius and rebuild the candidate set for it."""
+        self.candidate_radius = radius
+        self.neighborhood = self._neighborhood(radius)
+        self.neighbor_counts = [0] * (self.STRIDE * self.STRIDE)
+        self.candidates = set()
+        for i, stone in enumerate(self.cells):
+            if stone == self.BLACK or stone == self.WHITE:
+                for j in self.neighborhood[i]:
+                    self.neighbor_counts[j] += 1
+        for i, stone in enumerate(self.cells):
+            if stone == self.EMPTY and self.neighbor_counts[i]:
+                self.candidates.add(i)
     
     def get_valid_moves(self):
         """Return valid moves, prioritizing those near existing stones."""
-        valid_moves = []
         if not self.move_history:
             center = self.BOARD_SIZE // 2
             return [(center, center)]  # Start at center for first move
         
-        # Filter moves within radius of existing stones
-        radius = 3
-        occupied = set((r, c) for r, c, _, _ in self.move_history)
-        for i in range(self.BOARD_SIZE):
-            for j in range(self.BOARD_SIZE):
-                if self.board[i][j] == self.EMPTY:
-                    for hr, hc in occupied:
-                        if abs(i - hr) <= radius and abs(j - hc) <= radius:
-                            valid_moves.append((i, j))
-                            break
-        return valid_moves or [(i, j) for i in range(self.BOARD_SIZE) for j in range(self.BOARD_SIZE) if self.board[i][j] == self.EMPTY]
+        if self.candidates:
+            coords = self.coords
+            return [coords(i) for i in sorted(self.candidates)]
+        return [(i, j) for i in range(self.BOARD_SIZE) for j in range(self.BOARD_SIZE) if self.get_cell(i, j) == self.EMPTY]
     
     def is_valid_move(self, row, col):
         if not (0 <= row < self.BOARD_SIZE and 0 <= col < self.BOARD_SIZE):
             return False
-        return self.board[row][col] == self.EMPTY
+        return self.cells[(row + 1) * self.STRIDE + col + 1] == self.EMPTY
     
     def make_move(self, row, col):
+        """Play a stone for the current player in place; undo_move reverts it."""
         if not self.is_valid_move(row, col):
             return False
         
-        self.board[row][col] = self.current_player
+        player = self.current_player
+        index = (row + 1) * self.STRIDE + col + 1
+        record = MoveRecord(row, col, player, (), self.hash, self.symmetry_hash,
+                            self.game_over, self.winner, self.last_move)
+        self.cells[index] = player
+        self.empty_count -= 1
+        self.hash ^= self.ZOBRIST_STONES[player][index] ^ self.ZOBRIST_BLACK_TO_MOVE
+        self.symmetry_hash ^= self.SYMMETRY_KEYS[player][index]
         self.last_move = (row, col)
         
         # Check for captures and store captured positions
         captured_positions = self.check_captures(row, col)
-        self.captures[self.current_player] += len(captured_positions) // 2
+        self._update_patterns(index, player, captured_positions, 1)
+        self._update_candidates(index, captured_positions, 1)
         
         # Store move with captured positions
-        self.move_history.append((row, col, self.current_player, captured_positions))
+        record.captured = captured_positions
+        self.move_history.append(record)
         
         # Check for win conditions
         if self.check_win(row, col):
             self.game_over = True
-            self.winner = self.current_player
-        elif self.captures[self.current_player] >= 5:
+            self.winner = player
+        elif self.captures[player] >= 5:
             self.game_over = True
-            self.winner = self.current_player
-        elif len(self.get_valid_moves()) == 0:
+            self.winner = player
+        elif self.empty_count == 0:
             self.game_over = True
             self.winner = None
             if self.captures[self.BLACK] > self.captures[self.WHITE]:
@@ -66,89 +271,239 @@ class GameState:
             elif self.captures[self.WHITE] > self.captures[self.BLACK]:
                 self.winner = self.WHITE
         
-        self.current_player = self.BLACK if self.current_player == self.WHITE else self.WHITE
+        self.current_player = self.BLACK if player == self.WHITE else self.WHITE
         return True
     
     def undo_move(self):
         if not self.move_history:
             return False
         
-        row, col, player, captured_positions = self.move_history.pop()
-        self.board[row][col] = self.EMPTY
+        # Everything but the board itself comes back from the move's record
+        record = self.move_history.pop()
+        player = record.player
+        captured_positions = record.captured
+        index = (record.row + 1) * self.STRIDE + record.col + 1
+        self.cells[index] = self.EMPTY
+        self.empty_count += 1
         self.current_player = player
+        self.hash = record.hash
+        self.symmetry_hash = record.symmetry_hash
         
         # Restore captured stones
-        opponent = self.BLACK if player == self.WHITE else self.WHITE
-        for r, c in captured_positions:
-            self.board[r][c] = opponent
+        if captured_positions:
+            opponent = self.BLACK if player == self.WHITE else self.WHITE
+            for r, c in captured_positions:
+                self.cells[(r + 1) * self.STRIDE + c + 1] = opponent
+            self.empty_count -= len(captured_positions)
+            self.captures[player] -= len(captured_positions) // 2
         
-        # Restore capture counts
-        self.captures = {self.BLACK: 0, self.WHITE: 0}
-        for _, _, p, cp in self.move_history:
-            self.captures[p] += len(cp) // 2
+        self._update_patterns(index, player, captured_positions, -1)
+        self._update_candidates(index, captured_positions, -1)
         
-        self.last_move = self.move_history[-1][:2] if self.move_history else None
-        self.game_over = False
-        self.winner = None
+        self.last_move = record.last_move
+        self.game_over = record.game_over
+        self.winner = record.winner
         return True
     
+    def _capture_targets(self, index, player):
+        """Indices of the opponent stones player would capture by playing at index."""
+        cells = self.cells
+        opponent = self.BLACK if player == self.WHITE else self.WHITE
+        captured = []
+        
+        # The sentinel border ends each probe before it can leave the array
+        for step in self.ALL_STEPS:
+            i1 = index + step
+            if cells[i1] == opponent:
+                i2 = i1 + step
+                if cells[i2] == opponent and cells[i2 + step] == player:
+                    captured.append(i1)
+                    captured.append(i2)
+        return captured
+    
+    def capture_count(self, row, col, player):
+        """Number of pairs player would capture by playing at (row, col)."""
+        return len(self._capture_targets((row + 1) * self.STRIDE + col + 1, player)) // 2
+    
     def check_captures(self, row, col):
-        directions = [(0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1), (-1, 0), (-1, 1)]
-        opponent = self.BLACK if self.current_player == self.WHITE else self.WHITE
-        captured_positions = set()
-        
-        for dr, dc in directions:
-            r1, c1 = row + dr, col + dc
-            r2, c2 = row + 2*dr, col + 2*dc
-            r3, c3 = row + 3*dr, col + 3*dc
+        cells = self.cells
+        player = self.current_player
+        opponent = self.BLACK if player == self.WHITE else self.WHITE
+        captured = self._capture_targets((row + 1) * self.STRIDE + col + 1, player)
+        
+        if captured:
+            opponent_keys = self.ZOBRIST_STONES[opponent]
+            opponent_symmetry_keys = self.SYMMETRY_KEYS[opponent]
+            capture_keys = self.ZOBRIST_CAPTURES[player]
+            for i in captured:
+                cells[i] = self.EMPTY
+                self.hash ^= opponent_keys[i]
+                self.symmetry_hash ^= opponent_symmetry_keys[i]
+            self.empty_count += len(captured)
             
-            if (0 <= r1 < self.BOARD_SIZE and 0 <= c1 < self.BOARD_SIZE and
-                0 <= r2 < self.BOARD_SIZE and 0 <= c2 < self.BOARD_SIZE and
-                0 <= r3 < self.BOARD_SIZE and 0 <= c3 < self.BOARD_SIZE):
-                if (self.board[r1][c1] == opponent and 
-                    self.board[r2][c2] == opponent and 
-                    self.board[r3][c3] == self.current_player):
-                    captured_positions.add((r1, c1))
-                    captured_positions.add((r2, c2))
+            # Capture counts are hashed too, so both are updated together here
+            count = self.captures[player]
+            self.captures[player] = count + len(captured) // 2
+            self.hash ^= capture_keys[count] ^ capture_keys[count + len(captured) // 2]
+        
+        return tuple(self.coords(i) for i in captured)
+    
+    def _update_patterns(self, index, player, captured_positions, sign):
+        """Rescan the lines through a placed (sign=1) or removed (sign=-1) stone.
         
+        captured_positions are the opponent stones the move took, which
+        change in the opposite direction.
+        """
+        opponent = self.BLACK if player == self.WHITE else self.WHITE
+        line_ids = self.LINE_IDS
+        rings = self.CENTER_RINGS
+        lines = {ids[index] for ids in line_ids}
+        if rings[index] >= 0:
+            self.center_counts[player][rings[index]] += sign
         for r, c in captured_positions:
-            self.board[r][c] = self.EMPTY
+            i = (r + 1) * self.STRIDE + c + 1
+            for ids in line_ids:
+                lines.add(ids[i])
+            if rings[i] >= 0:
+                self.center_counts[opponent][rings[i]] -= sign
+        
+        black_counts = self.pattern_counts[self.BLACK]
+        white_counts = self.pattern_counts[self.WHITE]
+        for line in lines:
+            old_black, old_white = self.line_patterns[line]
+            new_black, new_white = new = self._scan_line(line)
+            self.line_patterns[line] = new
+            for kind in range(self.PATTERN_KINDS):
+                black_counts[kind] += new_black[kind] - old_black[kind]
+                white_counts[kind] += new_white[kind] - old_white[kind]
+    
+    def _update_candidates(self, index, captured_positions, sign):
+        """Adjust neighbor reference counts after a placement (sign=1) or its undo (sign=-1)."""
+        cells = self.cells
+        counts = self.neighbor_counts
+        candidates = self.candidates
+        neighborhood = self.neighborhood
+        
+        changed = [index] + [(r + 1) * self.STRIDE + c + 1 for r, c in captured_positions]
+        for n, i in enumerate(changed):
+            # The placed stone moves counts one way, captured stones the other
+            if (sign if n == 0 else -sign) > 0:
+                for j in neighborhood[i]:
+                    counts[j] += 1
+                    if counts[j] == 1 and cells[j] == self.EMPTY:
+                        candidates.add(j)
+            else:
+                for j in neighborhood[i]:
+                    counts[j] -= 1
+                    if counts[j] == 0:
+                        candidates.discard(j)
         
-        return list(captured_positions)
+        # Cells whose own contents changed are settled last
+        for i in changed:
+            if counts[i] and cells[i] == self.EMPTY:
+                candidates.add(i)
+            else:
+                candidates.discard(i)
+    
+    def _scan_line(self, line):
+        start, step, length = self.LINES[line]
+        # Slice one sentinel past each end so runs at the edge see OFFBOARD
+        segment = bytes(self.cells[start - step:start + (length + 1) * step:step])
+        result = []
+        for player in (self.BLACK, self.WHITE):
+            counts = [0] * self.PATTERN_KINDS
+            for run in self._RUN_PATTERNS[player].finditer(segment):
+                begin, end = run.span()
+                size = end - begin
+                if size >= 5:
+                    counts[self.FIVE] += 1
+                elif size >= 2:
+                    open_ends = (segment[begin - 1] == self.EMPTY) + (segment[end] == self.EMPTY)
+                    if open_ends:
+                        counts[2 * (size - 2) + open_ends - 1] += 1
+            forward, backward = self._CAPTURE_PATTERNS[player]
+            counts[self.CAPTURE_THREAT] = segment.count(forward) + segment.count(backward)
+            result.append(tuple(counts))
+        return tuple(result)
     
     def check_win(self, row, col):
-        directions = [(0, 1), (1, 1), (1, 0), (1, -1)]
+        return self.makes_five(row, col, self.current_player)
+    
+    def makes_five(self, row, col, player):
+        """True if a player stone at (row, col) is, or would be, part of five in a row."""
+        cells = self.cells
+        index = (row + 1) * self.STRIDE + col + 1
         
-        for dr, dc in directions:
+        for step in self.LINE_STEPS:
             count = 1
-            r, c = row + dr, col + dc
-            while 0 <= r < self.BOARD_SIZE and 0 <= c < self.BOARD_SIZE and self.board[r][c] == self.current_player:
+            i = index + step
+            while cells[i] == player:
                 count += 1
-                r += dr
-                c += dc
-            r, c = row - dr, col - dc
-            while 0 <= r < self.BOARD_SIZE and 0 <= c < self.BOARD_SIZE and self.board[r][c] == self.current_player:
+                i += step
+            i = index - step
+            while cells[i] == player:
                 count += 1
-                r -= dr
-                c -= dc
+                i -= step
             if count >= 5:
                 return True
         return False
     
+    def is_winning_move(self, row, col, player):
+        """True if player playing at (row, col) wins at once, by five in a row or a fifth capture."""
+        if self.makes_five(row, col, player):
+            return True
+        return self.captures[player] + self.capture_count(row, col, player) >= 5
+    
+    def canonical_key(self):
+        """Return (key, transform) for the smallest hash over the 8 symmetries.
+        
+        Positions that are rotations or reflections of each other share the
+        key. transform maps this position's cells onto the canonical frame
+        (see transform_move).
+        """
+        packed = self.symmetry_hash
+        mask = self._KEY_MASK
+        # Side to move and capture counts do not depend on the symmetry;
+        # slice 0 is the untransformed stone hash
+        rest = self.hash ^ (packed & mask)
+        key, transform = min((((packed >> (64 * t)) & mask) ^ rest, t) for t in range(8))
+        return key, transform
+    
+    @classmethod
+    def transform_move(cls, move, transform):
+        """Map (row, col) through one of the 8 board symmetries."""
+        return cls.coords(cls.SYMMETRY_MAPS[transform][cls.index(move[0], move[1])])
+    
     def get_winner(self):
         return self.winner if self.game_over else None
     
+    def __getstate__(self):
+        # The neighborhood table is shared per radius; rebuild it on unpickle
+        state = self.__dict__.copy()
+        del state['neighborhood']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.neighborhood = self._neighborhood(self.candidate_radius)
+    
     def clone(self):
-        clone = GameState()
-        for i in range(self.BOARD_SIZE):
-            for j in range(self.BOARD_SIZE):
-                clone.board[i][j] = self.board[i][j]
+        clone = GameState.__new__(GameState)
+        clone.cells = bytearray(self.cells)
         clone.current_player = self.current_player
         clone.captures = {player: self.captures[player] for player in self.captures}
         clone.last_move = self.last_move
         clone.game_over = self.game_over
         clone.winner = self.winner
         clone.move_history = self.move_history.copy()
+        clone.empty_count = self.empty_count
+        clone.hash = self.hash
+        clone.symmetry_hash = self.symmetry_hash
+        clone.line_patterns = self.line_patterns.copy()
+        clone.pattern_counts = {player: counts.copy() for player, counts in self.pattern_counts.items()}
+        clone.center_counts = {player: counts.copy() for player, counts in self.center_counts.items()}
+        clone.candidate_radius = self.candidate_radius
+        clone.neighborhood = self.neighborhood
+        clone.neighbor_counts = self.neighbor_counts.copy()
+        clone.candidates = self.candidates.copy()
         return clone
-    
-    
\ No newline at end of file
@@ -1,106 +1,237 @@
+import os
 from main import *
 from game_state import GameState
-from ai_logic import MinimaxAI
+from ai_logic import MinimaxAI, MCTSAI, BackgroundSearch
 
 class PenteGUI:
     def __init__(self):
         self.game_state = GameState()
-        self.ai = MinimaxAI(GameState.BLACK, max_depth=2, time_limit=2.0)  # AI plays as Black
+        book = BOOK_FILE if os.path.exists(BOOK_FILE) else None
+        self.engines = {
+            "Alpha-beta": MinimaxAI(GameState.BLACK, max_depth=2, time_limit=2.0, book=book,
+                                    cache_file=CACHE_FILE, cache_entries=CACHE_ENTRIES),
+            "MCTS": MCTSAI(GameState.BLACK, max_depth=2, time_limit=2.0),
+        }
+        self.engine_name = "Alpha-beta"
+        self.ai = self.engines[self.engine_name]  # AI plays as Black
         self.selected_cell = None
         self.game_over = False
         self.thinking = False
+        self.search = None
+        self.ponder = None  # search of the position after the human's predicted reply
+        self.ponder_move = None
+        self.ponder_enabled = True
         self.message = ""
         self.ai_thinking_time = 0
         self.ai_nodes_evaluated = 0
+        self.ai_depth_reached = 0
+        self.ai_stats = None  # search_stats() of the AI's last move
+        self.show_stats = False
         self.player_vs_ai = True
         self.difficulty_level = 2
         self.player_color = GameState.WHITE  # Human plays as White
+        self.buttons = []
+        self.create_surfaces()
     
-    def draw_board(self):
-        screen.fill(WHITE)
-        
-        # Draw board
+    def create_surfaces(self):
+        """Pre-render everything that does not change from frame to frame."""
         board_width = BOARD_SIZE * CELL_SIZE + 2 * BOARD_PADDING
         board_height = BOARD_SIZE * CELL_SIZE + 2 * BOARD_PADDING
-        board_rect = pygame.Rect(0, 0, board_width, board_height)
-        pygame.draw.rect(screen, BOARD_COLOR, board_rect)
+        self.board_surface = pygame.Surface((board_width, board_height))
+        self.board_surface.fill(BOARD_COLOR)
         
         # Draw grid lines
         for i in range(BOARD_SIZE):
             start_pos = (BOARD_PADDING + i * CELL_SIZE, BOARD_PADDING)
             end_pos = (BOARD_PADDING + i * CELL_SIZE, BOARD_PADDING + (BOARD_SIZE - 1) * CELL_SIZE)
-            pygame.draw.line(screen, LINE_COLOR, start_pos, end_pos, 1)
+            pygame.draw.line(self.board_surface, LINE_COLOR, start_pos, end_pos, 1)
             
             start_pos = (BOARD_PADDING, BOARD_PADDING + i * CELL_SIZE)
             end_pos = (BOARD_PADDING + (BOARD_SIZE - 1) * CELL_SIZE, BOARD_PADDING + i * CELL_SIZE)
-            pygame.draw.line(screen, LINE_COLOR, start_pos, end_pos, 1)
+            pygame.draw.line(self.board_surface, LINE_COLOR, start_pos, end_pos, 1)
         
-        # Draw stones
-        for row in range(BOARD_SIZE):
-            for col in range(BOARD_SIZE):
-                center_x = BOARD_PADDING + col * CELL_SIZE
-                center_y = BOARD_PADDING + row * CELL_SIZE
-                
-                if self.game_state.board[row][col] == GameState.BLACK:
-                    pygame.draw.circle(screen, BLACK, (center_x, center_y), STONE_RADIUS)
-                elif self.game_state.board[row][col] == GameState.WHITE:
-                    pygame.draw.circle(screen, WHITE, (center_x, center_y), STONE_RADIUS)
-                    pygame.draw.circle(screen, BLACK, (center_x, center_y), STONE_RADIUS, 1)
+        size = 2 * STONE_RADIUS + 2
+        center = (STONE_RADIUS + 1, STONE_RADIUS + 1)
+        black_stone = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.circle(black_stone, BLACK, center, STONE_RADIUS)
+        white_stone = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.circle(white_stone, WHITE, center, STONE_RADIUS)
+        pygame.draw.circle(white_stone, BLACK, center, STONE_RADIUS, 1)
+        self.stone_surfaces = {GameState.BLACK: black_stone, GameState.WHITE: white_stone}
+        
+        self.panel_rect = pygame.Rect(board_width, 0, INFO_PANEL_WIDTH, WINDOW_HEIGHT)
+        self.stats_rect = pygame.Rect(BOARD_PADDING, BOARD_PADDING, 360, 13 * (STATS_FONT_SIZE + 4) + 10)
+        self.stats_surface = pygame.Surface(self.stats_rect.size, pygame.SRCALPHA)
+        self.text_cache = {}
+        self.invalidate()
+    
+    def invalidate(self):
+        """Force the next frame to repaint the whole window."""
+        self.drawn_cells = None
+        self.drawn_last_move = None
+        self.drawn_panel = None
+        self.drawn_stats = None
+    
+    def render_text(self, text, color=BLACK, text_font=font):
+        key = (text, color, text_font)
+        surface = self.text_cache.get(key)
+        if surface is None:
+            if len(self.text_cache) > 256:
+                self.text_cache.clear()  # e.g. the ticking think-time label
+            surface = self.text_cache[key] = text_font.render(text, True, color)
+        return surface
+    
+    def cell_rect(self, row, col):
+        center_x = BOARD_PADDING + col * CELL_SIZE
+        center_y = BOARD_PADDING + row * CELL_SIZE
+        return pygame.Rect(center_x - CELL_SIZE // 2, center_y - CELL_SIZE // 2, CELL_SIZE, CELL_SIZE)
+    
+    def draw_cell(self, row, col):
+        rect = self.cell_rect(row, col)
+        screen.blit(self.board_surface, rect, rect)
+        
+        stone = self.game_state.get_cell(row, col)
+        if stone in self.stone_surfaces:
+            screen.blit(self.stone_surfaces[stone], (rect.centerx - STONE_RADIUS - 1, rect.centery - STONE_RADIUS - 1))
         
         # Highlight last move
-        if self.game_state.last_move:
-            row, col = self.game_state.last_move
-            center_x = BOARD_PADDING + col * CELL_SIZE
-            center_y = BOARD_PADDING + row * CELL_SIZE
-            pygame.draw.circle(screen, HIGHLIGHT_COLOR, (center_x, center_y), 5, 2)
+        if self.game_state.last_move == (row, col):
+            pygame.draw.circle(screen, HIGHLIGHT_COLOR, rect.center, 5, 2)
+        return rect
+    
+    def draw_board(self):
+        """Repaint only what changed since the last frame; returns the dirty rects."""
+        dirty = []
+        cells = bytes(self.game_state.cells)
+        
+        if self.drawn_cells is None:
+            screen.fill(WHITE)
+            screen.blit(self.board_surface, (0, 0))
+            for row in range(BOARD_SIZE):
+                for col in range(BOARD_SIZE):
+                    if self.game_state.get_cell(row, col) != GameState.EMPTY:
+                        self.draw_cell(row, col)
+            dirty.append(screen.get_rect())
+        elif cells != self.drawn_cells or self.game_state.last_move != self.drawn_last_move:
+            changed = {GameState.coords(i) for i in range(len(cells)) if cells[i] != self.drawn_cells[i]}
+            for move in (self.drawn_last_move, self.game_state.last_move):
+                if move is not None:
+                    changed.add(move)
+            for row, col in changed:
+                dirty.append(self.draw_cell(row, col))
         
-        self.draw_info_panel()
+        self.drawn_cells = cells
+        self.drawn_last_move = self.game_state.last_move
+        
+        if self.show_stats:
+            dirty.extend(self.draw_stats_overlay(dirty))
+        dirty.extend(self.draw_info_panel())
+        return dirty
     
-    def draw_info_panel(self):
-        # Draw info panel
-        panel_rect = pygame.Rect(BOARD_SIZE * CELL_SIZE + 2 * BOARD_PADDING, 0, INFO_PANEL_WIDTH, WINDOW_HEIGHT)
-        pygame.draw.rect(screen, (240, 240, 240), panel_rect)
-        pygame.draw.line(screen, BLACK, (panel_rect.left, 0), (panel_rect.left, WINDOW_HEIGHT), 2)
+    def layout_stats(self):
+        """Text lines for the search statistics overlay."""
+        stats = self.ai_stats
+        if stats is None:
+            return ["Search stats: no AI move yet", "S: hide"]
+        
+        def rate(value):
+            return "-" if value is None else f"{value:.0%}"
         
-        x = panel_rect.left + 20
+        if stats.get("engine") == "mcts":
+            win_rate = stats["win_rate"]
+            return [
+                f"Playouts: {stats['nodes']} in {stats['elapsed']:.2f}s, depth {stats['completed_depth']}",
+                f"Tree nodes: {stats['tree_nodes']}  Root visits: {stats['root_visits']}",
+                f"Visits reused from the last move: {stats['reused_visits']}",
+                f"Win rate of chosen move: {rate(win_rate)}",
+                "S: hide",
+            ]
+        
+        branching = stats["effective_branching_factor"]
+        return [
+            f"Nodes: {stats['nodes']} in {stats['elapsed']:.2f}s, depth {stats['completed_depth']}",
+            f"Nodes by ply: {' '.join(str(n) for n in stats['nodes_by_ply'][1:])}",
+            f"Nodes by iteration: {' '.join(str(n) for n in stats['nodes_by_iteration'])}",
+            f"Leaves: {stats['leaves']}  Interior: {stats['interior']}  Solver: {stats['solver_nodes']}",
+            f"Cutoffs: {stats['cutoffs']}  on first move: {rate(stats['first_move_cutoff_rate'])}",
+            f"Re-searches: {stats['researches']}  Aspiration fails: {stats['aspiration_fails']}",
+            f"TT hits: {stats['tt_hits']}/{stats['tt_probes']} ({rate(stats['tt_hit_rate'])})",
+            f"Effective branching: {'-' if branching is None else f'{branching:.1f}'}",
+            f"Evaluation: {stats['time_evaluation']:.3f}s",
+            f"Move generation: {stats['time_move_generation']:.3f}s",
+            f"Cloning: {stats['time_cloning']:.4f}s",
+            "S: hide",
+        ]
+    
+    def draw_stats_overlay(self, dirty):
+        """Draw the stats box over the board when its text or the board under it changed."""
+        lines = self.layout_stats()
+        rect = self.stats_rect
+        if lines == self.drawn_stats and rect.collidelist(dirty) < 0:
+            return []
+        self.drawn_stats = lines
+        
+        # Repaint the board under the box, then the translucent box on top
+        screen.blit(self.board_surface, rect, rect)
+        first_row, last_row = (rect.top - BOARD_PADDING) // CELL_SIZE, (rect.bottom - BOARD_PADDING) // CELL_SIZE + 1
+        first_col, last_col = (rect.left - BOARD_PADDING) // CELL_SIZE, (rect.right - BOARD_PADDING) // CELL_SIZE + 1
+        for row in range(max(0, first_row), min(BOARD_SIZE, last_row + 1)):
+            for col in range(max(0, first_col), min(BOARD_SIZE, last_col + 1)):
+                if self.cell_rect(row, col).colliderect(rect):
+                    self.draw_cell(row, col)
+        self.stats_surface.fill((255, 255, 255, 200))
+        for i, text in enumerate(lines):
+            self.stats_surface.blit(self.render_text(text, BLACK, stats_font), (8, 5 + i * (STATS_FONT_SIZE + 4)))
+        screen.blit(self.stats_surface, rect)
+        return [rect.inflate(CELL_SIZE, CELL_SIZE)]
+    
+    def layout_info_panel(self):
+        """Return the panel's text lines and buttons for the current state."""
+        x = self.panel_rect.left + 20
         y = 30
+        lines = []
+        buttons = []
         
         # Display game information
-        title = font.render("Pente Game", True, BLACK)
-        screen.blit(title, (x, y))
+        lines.append(("Pente Game", BLACK, (x, y)))
         y += 50
         
         current_player = "Black" if self.game_state.current_player == GameState.BLACK else "White"
-        player_text = font.render(f"Current Player: {current_player}", True, BLACK)
-        screen.blit(player_text, (x, y))
+        lines.append((f"Current Player: {current_player}", BLACK, (x, y)))
         y += 40
         
-        black_captures = font.render(f"Black Captures: {self.game_state.captures[GameState.BLACK]}", True, BLACK)
-        screen.blit(black_captures, (x, y))
+        lines.append((f"Black Captures: {self.game_state.captures[GameState.BLACK]}", BLACK, (x, y)))
         y += 30
         
-        white_captures = font.render(f"White Captures: {self.game_state.captures[GameState.WHITE]}", True, BLACK)
-        screen.blit(white_captures, (x, y))
+        lines.append((f"White Captures: {self.game_state.captures[GameState.WHITE]}", BLACK, (x, y)))
         y += 50
         
         mode = "Player vs AI" if self.player_vs_ai else "Player vs Player"
-        mode_text = font.render(f"Game Mode: {mode}", True, BLACK)
-        screen.blit(mode_text, (x, y))
+        lines.append((f"Game Mode: {mode}", BLACK, (x, y)))
         y += 30
         
         if self.player_vs_ai:
-            ai_text = font.render(f"AI Difficulty: {self.difficulty_level} (Depth {self.difficulty_level}, Time ~{self.difficulty_level}s)", True, BLACK)
-            screen.blit(ai_text, (x, y))
+            lines.append((f"AI Difficulty: {self.difficulty_level} (Depth {self.difficulty_level}, Time ~{self.difficulty_level}s)", BLACK, (x, y)))
+            y += 30
+            
+            lines.append((f"Engine: {self.engine_name} (E to switch)", BLACK, (x, y)))
             y += 30
             
             if self.ai_thinking_time > 0:
-                time_text = font.render(f"AI Think Time: {self.ai_thinking_time:.2f}s", True, BLACK)
-                screen.blit(time_text, (x, y))
+                lines.append((f"AI Think Time: {self.ai_thinking_time:.2f}s", BLACK, (x, y)))
+                y += 30
+                
+                lines.append((f"Nodes Evaluated: {self.ai_nodes_evaluated}", BLACK, (x, y)))
                 y += 30
                 
-                nodes_text = font.render(f"Nodes Evaluated: {self.ai_nodes_evaluated}", True, BLACK)
-                screen.blit(nodes_text, (x, y))
+                lines.append((f"Depth Reached: {self.ai_depth_reached}", BLACK, (x, y)))
                 y += 30
+                
+                if self.ai_stats is not None and len(self.ai_stats["principal_variation"]) > 1:
+                    # The AI's move is already on the board; show the line expected after it
+                    line = " ".join(f"{row},{col}" for row, col in self.ai_stats["principal_variation"][1:5])
+                    lines.append((f"Expected: {line}", BLACK, (x, y)))
+                    y += 30
         
         y += 20
         
@@ -114,47 +245,68 @@ class PenteGUI:
             else:
                 winner = "Game Draw!"
             
-            winner_text = font.render(winner, True, (200, 0, 0))
-            screen.blit(winner_text, (x, y))
+            lines.append((winner, (200, 0, 0), (x, y)))
         elif self.thinking:
-            thinking_text = font.render("AI is thinking...", True, (0, 0, 200))
-            screen.blit(thinking_text, (x, y))
+            elapsed = time.time() - self.search_start_time
+            lines.append((f"AI is thinking... {elapsed:.1f}s", (0, 0, 200), (x, y)))
+            lines.append(("Space: move now  Esc: cancel", (0, 0, 200), (x, y + 25)))
         elif self.message:
-            message_text = font.render(self.message, True, (0, 0, 200))
-            screen.blit(message_text, (x, y))
+            lines.append((self.message, (0, 0, 200), (x, y)))
         
         y += 60
-        self.draw_button(x, y, 260, 40, "New Game", self.new_game)
+        buttons.append((pygame.Rect(x, y, 260, 40), "New Game", self.new_game))
         y += 50
-        self.draw_button(x, y, 260, 40, "Switch Game Mode", self.switch_game_mode)
+        buttons.append((pygame.Rect(x, y, 260, 40), "Switch Game Mode", self.switch_game_mode))
         y += 50
-        self.draw_button(x, y, 260, 40, "Undo Move", self.undo_move)
+        buttons.append((pygame.Rect(x, y, 260, 40), "Undo Move", self.undo_move))
         
         if self.player_vs_ai:
             y += 50
-            self.draw_button(x, y, 260, 40, "Change Difficulty", self.cycle_difficulty)
+            buttons.append((pygame.Rect(x, y, 260, 40), "Change Difficulty", self.cycle_difficulty))
+            y += 50
+            buttons.append((pygame.Rect(x, y, 260, 40), f"Pondering: {'On' if self.ponder_enabled else 'Off'}",
+                            self.toggle_pondering))
         else:
             y += 50
-            self.draw_button(x, y, 260, 40, "Switch Color", self.switch_color)
+            buttons.append((pygame.Rect(x, y, 260, 40), "Switch Color", self.switch_color))
+        
+        return lines, buttons
     
-    def draw_button(self, x, y, width, height, text, action=None):
+    def draw_info_panel(self):
+        lines, self.buttons = self.layout_info_panel()
         mouse = pygame.mouse.get_pos()
-        click = pygame.mouse.get_pressed()
+        hovered = [rect.collidepoint(mouse) for rect, _, _ in self.buttons]
         
-        button_rect = pygame.Rect(x, y, width, height)
-        hover = button_rect.collidepoint(mouse)
+        # Repaint only when something visible in the panel has changed
+        panel_key = (tuple(lines), tuple(label for _, label, _ in self.buttons), tuple(hovered))
+        if panel_key == self.drawn_panel:
+            return []
+        self.drawn_panel = panel_key
         
+        pygame.draw.rect(screen, (240, 240, 240), self.panel_rect)
+        pygame.draw.line(screen, BLACK, (self.panel_rect.left, 0), (self.panel_rect.left, WINDOW_HEIGHT), 2)
+        
+        for text, color, position in lines:
+            screen.blit(self.render_text(text, color), position)
+        for (rect, label, _), hover in zip(self.buttons, hovered):
+            self.draw_button(rect, label, hover)
+        return [self.panel_rect]
+    
+    def draw_button(self, button_rect, text, hover):
         color = (200, 200, 200) if hover else (180, 180, 180)
         pygame.draw.rect(screen, color, button_rect)
         pygame.draw.rect(screen, BLACK, button_rect, 2)
         
-        text_surf = font.render(text, True, BLACK)
+        text_surf = self.render_text(text)
         text_rect = text_surf.get_rect(center=button_rect.center)
         screen.blit(text_surf, text_rect)
-        
-        if hover and click[0] == 1 and action is not None:
-            pygame.time.delay(300)
-            action()
+    
+    def handle_button_click(self, mouse_pos):
+        for rect, _, action in self.buttons:
+            if rect.collidepoint(mouse_pos):
+                action()
+                return True
+        return False
     
     def get_board_position(self, mouse_pos):
         x, y = mouse_pos
@@ -183,27 +335,98 @@ class PenteGUI:
             self.game_state.make_move(row, col)
             self.message = ""
             
+            if self.ponder is not None and (row, col) == self.ponder_move and not self.game_state.game_over:
+                self.ponder_hit()
+                return
+            self.stop_pondering()
+            
             if self.game_state.game_over:
                 return
             
             if self.player_vs_ai and self.game_state.current_player == GameState.BLACK:  # AI's turn (Black)
-                self.thinking = True
-                self.draw_board()
-                pygame.display.flip()
-                
-                start_time = time.time()
-                ai_move = self.ai.get_best_move(self.game_state)
-                self.ai_thinking_time = time.time() - start_time
-                self.ai_nodes_evaluated = self.ai.nodes_evaluated
-                
-                if ai_move:
-                    self.game_state.make_move(ai_move[0], ai_move[1])
-                
-                self.thinking = False
+                self.start_ai_search()
         else:
             self.message = "Invalid move!"
     
+    def start_ai_search(self):
+        """Search on a background thread; the result arrives as an AI_MOVE_EVENT."""
+        self.thinking = True
+        self.search_start_time = time.time()
+        self.search = BackgroundSearch(self.ai, self.game_state, self.post_ai_move)
+        self.search.start()
+    
+    def start_pondering(self):
+        """Search the position after the human's most likely reply while they think."""
+        self.ponder_move = self.ai.predict_reply(self.game_state)
+        if self.ponder_move is None:
+            return
+        state = self.game_state.clone()
+        state.make_move(self.ponder_move[0], self.ponder_move[1])
+        if state.game_over:
+            return
+        self.ponder = BackgroundSearch(self.ai, state, self.post_ai_move, ponder=True)
+        self.ponder.start()
+    
+    def ponder_hit(self):
+        """The human played the predicted move: the ponder search becomes the AI's search."""
+        search = self.ponder
+        self.ponder = None
+        self.thinking = True
+        self.search_start_time = time.time()
+        self.search = search
+        search.ponderhit()
+        self.message = "Ponder hit!"
+        if not search.is_alive():
+            self.finish_ai_search(search)  # it finished while the human was thinking
+    
+    def stop_pondering(self):
+        if self.ponder is not None:
+            self.ponder.cancel()
+            self.ponder.join()  # the AI object is shared, so let the ponder search unwind first
+            self.ponder = None
+    
+    def post_ai_move(self, search, move):
+        # Runs on the search thread; pygame's event queue is safe to post to from there
+        pygame.event.post(pygame.event.Event(AI_MOVE_EVENT, search=search, move=move))
+    
+    def handle_ai_move(self, event):
+        if event.search is not self.search:
+            return  # result of a search that was cancelled, or a ponder search still waiting for a hit
+        self.finish_ai_search(event.search)
+    
+    def finish_ai_search(self, search):
+        self.search = None
+        self.thinking = False
+        self.ai_thinking_time = time.time() - self.search_start_time
+        self.ai_nodes_evaluated = self.ai.nodes_evaluated
+        self.ai_depth_reached = self.ai.completed_depth
+        self.ai_stats = self.ai.search_stats()
+        
+        if search.move:
+            self.game_state.make_move(search.move[0], search.move[1])
+            if self.ponder_enabled and not self.game_state.game_over:
+                self.start_pondering()
+    
+    def move_now(self):
+        if self.search is not None:
+            self.search.move_now()
+    
+    def cancel_search(self):
+        """Stop the AI search and take back the move it was answering."""
+        if self.search is None:
+            return False
+        self.search.cancel()
+        self.search.join()  # the AI object is shared, so let the old search unwind first
+        self.search = None
+        self.thinking = False
+        self.game_state.undo_move()
+        return True
+    
     def undo_move(self):
+        self.stop_pondering()
+        if self.cancel_search():
+            self.message = "AI search cancelled, move undone!"
+            return
         if self.game_state.undo_move():
             self.message = "Move undone!"
             if self.player_vs_ai and self.game_state.current_player == GameState.BLACK:
@@ -213,12 +436,19 @@ class PenteGUI:
             self.message = "No moves to undo!"
     
     def new_game(self):
+        self.stop_pondering()
+        if self.search is not None:
+            self.search.cancel()
+            self.search.join()
+            self.search = None
         self.game_state = GameState()
         self.game_over = False
         self.thinking = False
         self.message = "New game started!"
         self.ai_thinking_time = 0
         self.ai_nodes_evaluated = 0
+        self.ai_depth_reached = 0
+        self.ai_stats = None
         self.player_color = GameState.WHITE
     
     def switch_game_mode(self):
@@ -236,6 +466,31 @@ class PenteGUI:
         self.ai.time_limit = self.difficulty_level * 0.8
         self.message = f"AI Difficulty set to {self.difficulty_level} (Depth {self.difficulty_level}, Time ~{self.difficulty_level*0.8}s)"
     
+    def toggle_stats(self):
+        """Show or hide the search statistics overlay; timing is only collected while it is shown."""
+        self.show_stats = not self.show_stats
+        self.ai.profile = self.show_stats
+        self.invalidate()
+    
+    def switch_engine(self):
+        """Alternate between the alpha-beta and MCTS engines at the current difficulty."""
+        if self.thinking:
+            return
+        self.stop_pondering()
+        self.engine_name = "MCTS" if self.engine_name == "Alpha-beta" else "Alpha-beta"
+        self.ai = self.engines[self.engine_name]
+        self.ai.max_depth = self.difficulty_level
+        self.ai.time_limit = self.difficulty_level * 0.8
+        self.ai.profile = self.show_stats
+        self.ai_stats = None
+        self.message = f"Engine: {self.engine_name}"
+    
+    def toggle_pondering(self):
+        self.ponder_enabled = not self.ponder_enabled
+        if not self.ponder_enabled:
+            self.stop_pondering()
+        self.message = f"Pondering {'on' if self.ponder_enabled else 'off'}"
+    
     def switch_color(self):
         self.player_color = GameState.BLACK if self.player_color == GameState.WHITE else GameState.WHITE
         self.message = f"Your color is now {('Black' if self.player_color == GameState.BLACK else 'White')}"
@@ -245,14 +500,42 @@ class PenteGUI:
         clock = pygame.time.Clock()
         
         while True:
-            for event in pygame.event.get():
+            dirty = self.draw_board()
+            if dirty:
+                pygame.display.update(dirty)
+            
+            # While idle, sleep until there is input; AI results arrive as events too
+            if self.thinking:
+                events = pygame.event.get()
+            else:
+                events = [pygame.event.wait()] + pygame.event.get()
+            
+            for event in events:
                 if event.type == pygame.QUIT:
+                    if self.search is not None:
+                        self.search.cancel()
+                        self.search.join()
+                    self.stop_pondering()
+                    for engine in self.engines.values():
+                        engine.close()
                     pygame.quit()
                     sys.exit()
                 elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if event.button == 1:
+                    if event.button == 1 and not self.handle_button_click(event.pos):
                         self.handle_click(event.pos)
+                elif event.type == pygame.VIDEOEXPOSE:
+                    self.invalidate()
+                elif event.type == AI_MOVE_EVENT:
+                    self.handle_ai_move(event)
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_s:
+                    self.toggle_stats()
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_e:
+                    self.switch_engine()
+                elif event.type == pygame.KEYDOWN and self.thinking:
+                    if event.key == pygame.K_SPACE:
+                        self.move_now()
+                    elif event.key == pygame.K_ESCAPE:
+                        self.cancel_search()
+                        self.message = "AI search cancelled, move undone!"
             
-            self.draw_board()
-            pygame.display.flip()
             clock.tick(60)
\ No newline at end of file
@@ -21,8 +21,14 @@ WINDOW_WIDTH = BOARD_SIZE * CELL_SIZE + 2 * BOARD_PADDING + INFO_PANEL_WIDTH
 WINDOW_HEIGHT = BOARD_SIZE * CELL_SIZE + 2 * BOARD_PADDING
 STONE_RADIUS = CELL_SIZE // 2 - 2
 FONT_SIZE = 24
+STATS_FONT_SIZE = 16
+AI_MOVE_EVENT = pygame.USEREVENT + 1  # posted by the background search when the AI has a move
+BOOK_FILE = "opening_book.bin"  # used by the AI when present (build with opening_book.py)
+CACHE_FILE = "search_cache.bin"  # the AI's search results, kept between sessions
+CACHE_ENTRIES = 200000
 
 # Create the game window
 screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
 pygame.display.set_caption("Pente Game")
-font = pygame.font.SysFont("Arial", FONT_SIZE)
\ No newline at end of file
+font = pygame.font.SysFont("Arial", FONT_SIZE)
+stats_font = pygame.font.SysFont("Arial", STATS_FONT_SIZE)
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""Opening book: a sorted binary file of (position key, move, weight) records.
+
+Positions are keyed by GameState.canonical_key(), so all 8 rotations and
+reflections of a position share one entry. Moves are stored in the
+canonical frame and mapped back to the actual position at lookup time.
+
+The file is memory-mapped and binary-searched, so opening a book costs
+nothing however large it is.
+
+    python opening_book.py --selfplay results.jsonl --plies 10 -o opening_book.bin
+    python opening_book.py --records games.pgr --plies 10 -o opening_book.bin
+    python opening_book.py --search-depth 4 --plies 4 --width 3 -o opening_book.bin
+"""
+import argparse
+import itertools
+import json
+import mmap
+import struct
+import sys
+
+from game_state import GameState
+from game_records import GameReader, DRAW, UNFINISHED
+
+MAGIC = b"PBK1"
+HEADER = struct.Struct("<4sI")  # magic, record count
+RECORD = struct.Struct("<QHH")  # canonical key, canonical move (row * 19 + col), weight
+MAX_WEIGHT = 0xFFFF
+
+
+class OpeningBook:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an opening book")
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def _key_at(self, i):
+        return struct.unpack_from("<Q", self._map, HEADER.size + i * RECORD.size)[0]
+
+    def entries(self, key):
+        """All (canonical move index, weight) pairs stored for a key."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        found = []
+        while lo < self.count:
+            record_key, move, weight = RECORD.unpack_from(self._map, HEADER.size + lo * RECORD.size)
+            if record_key != key:
+                break
+            found.append((move, weight))
+            lo += 1
+        return found
+
+    def lookup(self, game_state):
+        """Return the heaviest legal book move for the position, or None."""
+        key, transform = game_state.canonical_key()
+        inverse = GameState.INVERSE_SYMMETRY[transform]
+        for move, _ in sorted(self.entries(key), key=lambda entry: -entry[1]):
+            row, col = GameState.transform_move(divmod(move, GameState.BOARD_SIZE), inverse)
+            if game_state.is_valid_move(row, col):
+                return (row, col)
+        return None
+
+
+class BookBuilder:
+    """Collects weighted moves per canonical position and writes a book file."""
+
+    def __init__(self):
+        self.positions = {}
+
+    def add(self, game_state, move, weight=1):
+        key, transform = game_state.canonical_key()
+        row, col = GameState.transform_move(move, transform)
+        moves = self.positions.setdefault(key, {})
+        canonical = row * GameState.BOARD_SIZE + col
+        moves[canonical] = moves.get(canonical, 0) + weight
+
+    def add_game(self, moves, winner, plies, opening=0):
+        """Add the first plies moves of a finished game.
+
+        Moves by the eventual winner count double; moves by the loser are
+        skipped. The first opening moves were played at random, so they
+        are played through but not learned.
+        """
+        state = GameState()
+        for ply, (row, col) in enumerate(moves[:plies]):
+            player = state.current_player
+            if ply >= opening:
+                if winner is None:
+                    self.add(state, (row, col), 1)
+                elif player == winner:
+                    self.add(state, (row, col), 2)
+            if not state.make_move(row, col):
+                raise ValueError(f"illegal move {(row, col)} in game record")
+
+    def add_search(self, ai_factory, plies, width, state=None):
+        """Expand the opening tree with an engine, keeping width replies per position."""
+        state = state or GameState()
+        if plies == 0 or state.game_over:
+            return
+        ai = ai_factory(state.current_player)
+        candidates = []
+        for _ in range(width):
+            move = ai.get_best_move(state, exclude=candidates)
+            if move is None:
+                break
+            candidates.append(move)
+        ai.close()
+        for rank, move in enumerate(candidates):
+            self.add(state, move, width - rank)
+            state.make_move(move[0], move[1])
+            self.add_search(ai_factory, plies - 1, width, state)
+            state.undo_move()
+
+    def write(self, path):
+        records = []
+        for key, moves in self.positions.items():
+            for move, weight in moves.items():
+                records.append((key, move, min(weight, MAX_WEIGHT)))
+        records.sort()
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(records)))
+            for record in records:
+                f.write(RECORD.pack(*record))
+        return len(records)
+
+
+def load_selfplay(path):
+    """Yield (moves, winner, random opening plies) from a selfplay.py JSONL results file."""
+    winners = {"black": GameState.BLACK, "white": GameState.WHITE}
+    with open(path) as f:
+        for line in f:
+            game = json.loads(line)
+            if game["winner"] == "unfinished":
+                continue
+            opening = sum(1 for _ in itertools.takewhile(lambda m: m.get("random"), game["moves"]))
+            yield [tuple(m["move"]) for m in game["moves"]], winners.get(game["winner"]), opening
+
+
+def load_records(path):
+    """Yield (moves, winner, random opening plies) from a game_records.py record file."""
+    with GameReader(path) as reader:
+        for record in reader:
+            if record.winner == UNFINISHED:
+                continue
+            yield record.moves, None if record.winner == DRAW else record.winner, record.opening
+
+
+def main(argv=None):
+    from ai_logic import MinimaxAI
+
+    parser = argparse.ArgumentParser(description="Build a Pente opening book.")
+    parser.add_argument("-o", "--output", default="opening_book.bin")
+    parser.add_argument("--plies", type=int, default=8, help="book depth in plies")
+    parser.add_argument("--selfplay", nargs="*", default=[], help="selfplay.py JSONL files to learn from")
+    parser.add_argument("--records", nargs="*", default=[], help="game_records.py files to learn from")
+    parser.add_argument("--search-depth", type=int, default=0, help="also expand the tree with a search of this depth")
+    parser.add_argument("--search-time", type=float, default=30.0)
+    parser.add_argument("--width", type=int, default=2, help="engine moves kept per position when searching")
+    args = parser.parse_args(argv)
+
+    builder = BookBuilder()
+    for path in args.selfplay:
+        for moves, winner, opening in load_selfplay(path):
+            builder.add_game(moves, winner, args.plies, opening)
+    for path in args.records:
+        for moves, winner, opening in load_records(path):
+            builder.add_game(moves, winner, args.plies, opening)
+    if args.search_depth:
+        builder.add_search(lambda player: MinimaxAI(player, max_depth=args.search_depth, time_limit=args.search_time),
+                           args.plies, args.width)
+
+    count = builder.write(args.output)
+    print(f"wrote {count} records for {len(builder.positions)} positions to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Headless engine-vs-engine matches, streamed to JSONL.
+
+Runs without pygame, so it can be used on servers for long regression
+matches, e.g.
+
+    python selfplay.py --games 1000 --processes 16 --depth-a 3 --depth-b 2 -o results.jsonl
+    python selfplay.py --games 100 --engine-a mcts --time-a 1 --time-b 1 -o mcts.jsonl
+
+Engine A and engine B swap colors every game. Each finished game is
+written as one JSON line as soon as it completes.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from game_state import GameState
+from ai_logic import MinimaxAI, MCTSAI
+
+COLOR_NAMES = {GameState.BLACK: "black", GameState.WHITE: "white", None: "draw"}
+
+
+def make_engine(config, player):
+    if config.get("engine") == "mcts":
+        return MCTSAI(player, time_limit=config["time"], candidate_radius=config.get("radius"))
+    return MinimaxAI(player, max_depth=config["depth"], time_limit=config["time"],
+                     candidate_radius=config.get("radius"), book=config.get("book"))
+
+
+def play_game(game_index, config_a, config_b, opening_moves=0, max_moves=361, seed=None):
+    """Play one game and return its result record."""
+    # Engine A takes White (who moves first) in even games and Black in odd ones
+    a_color = GameState.WHITE if game_index % 2 == 0 else GameState.BLACK
+    b_color = GameState.BLACK if a_color == GameState.WHITE else GameState.WHITE
+    engines = {a_color: make_engine(config_a, a_color), b_color: make_engine(config_b, b_color)}
+
+    state = GameState()
+    rng = random.Random(seed if seed is None else seed + game_index)
+    moves = []
+
+    # Optional random opening so otherwise deterministic engines play different games
+    for _ in range(opening_moves):
+        if state.game_over:
+            break
+        player = state.current_player
+        row, col = rng.choice(state.get_valid_moves())
+        state.make_move(row, col)
+        moves.append({"move": [row, col], "player": COLOR_NAMES[player], "random": True})
+
+    while not state.game_over and len(moves) < max_moves:
+        player = state.current_player
+        engine = engines[player]
+        start = time.time()
+        move = engine.get_best_move(state)
+        elapsed = time.time() - start
+        state.make_move(move[0], move[1])
+        moves.append({
+            "move": list(move),
+            "player": COLOR_NAMES[player],
+            "time": round(elapsed, 4),
+            "nodes": engine.nodes_evaluated,
+            "depth": engine.completed_depth,
+        })
+
+    for engine in engines.values():
+        engine.close()
+
+    if state.game_over:
+        winner = COLOR_NAMES[state.winner]
+    else:
+        winner = "unfinished"
+    return {
+        "game": game_index,
+        "engine_a": COLOR_NAMES[a_color],
+        "winner": winner,
+        "winner_engine": "a" if state.winner == a_color else "b" if state.winner == b_color else None,
+        "move_count": len(moves),
+        "captures": {"black": state.captures[GameState.BLACK], "white": state.captures[GameState.WHITE]},
+        "moves": moves,
+    }
+
+
+def run_match(games, config_a, config_b, output, processes=1, opening_moves=0, max_moves=361, seed=None):
+    """Play games across a process pool and stream each result to output."""
+    tally = {"a": 0, "b": 0, None: 0}
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(play_game, i, config_a, config_b, opening_moves, max_moves, seed)
+                   for i in range(games)]
+        for future in as_completed(futures):
+            result = future.result()
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+            tally[result["winner_engine"]] += 1
+    return tally
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Play headless Pente matches between two engine configurations.")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--processes", type=int, default=1, help="games played in parallel")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file ('-' for stdout)")
+    parser.add_argument("--engine-a", choices=("minimax", "mcts"), default="minimax")
+    parser.add_argument("--depth-a", type=int, default=2)
+    parser.add_argument("--time-a", type=float, default=2.0)
+    parser.add_argument("--radius-a", type=int, default=None)
+    parser.add_argument("--book-a", default=None, help="opening book file for engine A")
+    parser.add_argument("--engine-b", choices=("minimax", "mcts"), default="minimax")
+    parser.add_argument("--depth-b", type=int, default=2)
+    parser.add_argument("--time-b", type=float, default=2.0)
+    parser.add_argument("--radius-b", type=int, default=None)
+    parser.add_argument("--book-b", default=None, help="opening book file for engine B")
+    parser.add_argument("--opening-moves", type=int, default=0,
+                        help="random moves played before the engines take over")
+    parser.add_argument("--max-moves", type=int, default=361)
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config_a = {"engine": args.engine_a, "depth": args.depth_a, "time": args.time_a, "radius": args.radius_a,
+                "book": args.book_a}
+    config_b = {"engine": args.engine_b, "depth": args.depth_b, "time": args.time_b, "radius": args.radius_b,
+                "book": args.book_b}
+
+    output = sys.stdout if args.output == "-" else open(args.output, "a")
+    try:
+        tally = run_match(args.games, config_a, config_b, output, args.processes,
+                          args.opening_moves, args.max_moves, args.seed)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"A wins: {tally['a']}  B wins: {tally['b']}  draws/unfinished: {tally[None]}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+"""Multi-game analysis server with a line protocol over TCP or stdin/stdout.
+
+Many games are kept in one process on an asyncio front end. Searches go
+to a fixed set of worker processes. Each session is pinned to one worker,
+so it keeps its own transposition table warm and never shares it with
+another session. Every search has an absolute deadline counted from when
+its request arrived, and the searches on a worker run one after another.
+A request whose worker is booked up so far ahead that the search would get
+less than MIN_SEARCH_SHARE of its time is refused with "ERR busy" rather
+than queued; --max-pending can also cap the searches in flight overall.
+
+    python server.py serve --port 7878 --workers 4
+    python server.py serve --stdio
+    python server.py load --port 7878 --clients 32 --moves 10   # load generator
+
+Requests are one line each, answered by one line:
+
+    NEW                           -> OK <session>
+    MOVE <session> <row> <col>    -> OK | ERR ...
+    UNDO <session>                -> OK | ERR ...
+    SEARCH <session> [ms] [depth] -> BEST <row> <col> <nodes> <depth> <ms>
+    PLAY <session> [ms] [depth]   -> like SEARCH, and the move is played
+    BOARD <session>               -> BOARD <player to move> <19 rows of .BW>
+    CLOSE <session>               -> OK
+    STATS                         -> STATS <json>
+"""
+import argparse
+import asyncio
+import collections
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from game_state import GameState
+from ai_logic import MinimaxAI
+
+DEFAULT_PORT = 7878
+DEADLINE_GRACE = 1.0  # seconds a search may overrun its time limit before the request fails
+MIN_SEARCH_SHARE = 0.5  # least part of its time limit a search must be able to get on its worker
+SESSION_ENGINES = 64  # engines (and tables) kept per worker process
+STONES = {GameState.EMPTY: ".", GameState.BLACK: "B", GameState.WHITE: "W"}
+
+
+class ProtocolError(Exception):
+    """A request the server cannot carry out; sent back as "ERR <message>"."""
+
+
+# Per-process state for search workers: (session, player) -> MinimaxAI, least recently used first
+_worker_engines = collections.OrderedDict()
+_worker_tt_bits = 16
+
+
+def _init_worker(tt_size_bits):
+    global _worker_tt_bits
+    _worker_tt_bits = tt_size_bits
+
+
+def _search(session_id, moves, deadline, depth):
+    """Replay moves and search the position until deadline (a time.time() value).
+    
+    Returns (move, nodes, completed depth), or None when the deadline had
+    already passed before the search could start.
+    """
+    if time.time() >= deadline:
+        return None
+    state = GameState()
+    for row, col in moves:
+        state.make_move(row, col)
+    key = (session_id, state.current_player)
+    ai = _worker_engines.pop(key, None)
+    if ai is None:
+        ai = MinimaxAI(state.current_player, tt_size_bits=_worker_tt_bits)
+    _worker_engines[key] = ai
+    while len(_worker_engines) > SESSION_ENGINES:
+        _worker_engines.popitem(last=False)
+    ai.max_depth = depth
+    # Stop halfway through the grace period, so the best move so far still
+    # reaches the server before it gives up on the request
+    timer = threading.Timer(deadline + DEADLINE_GRACE / 2 - time.time(), ai.stop)
+    timer.start()
+    try:
+        ai.time_limit = max(0.0, deadline - time.time())
+        move = ai.get_best_move(state)
+    finally:
+        timer.cancel()
+    return move, ai.nodes_evaluated, ai.completed_depth
+
+
+def _drop_session(session_id):
+    for player in (GameState.BLACK, GameState.WHITE):
+        _worker_engines.pop((session_id, player), None)
+
+
+class Session:
+    def __init__(self, session_id, worker):
+        self.id = session_id
+        self.worker = worker
+        self.state = GameState()
+        self.moves = []
+        self.busy = False
+
+
+class Metrics:
+    """Request counts and recent search latencies."""
+
+    def __init__(self, window=10000):
+        self.start_time = time.time()
+        self.requests = 0
+        self.searches = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.latencies = collections.deque(maxlen=window)
+
+    def snapshot(self, pending, sessions):
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        uptime = time.time() - self.start_time
+        return {
+            "uptime": round(uptime, 1),
+            "sessions": sessions,
+            "pending": pending,
+            "requests": self.requests,
+            "searches": self.searches,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "searches_per_sec": round(self.searches / uptime, 2) if uptime > 0 else 0.0,
+            "latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99)},
+        }
+
+
+class AnalysisServer:
+    def __init__(self, workers=2, max_pending=None, time_limit=1.0, depth=3, tt_size_bits=16):
+        self.time_limit = time_limit
+        self.depth = depth
+        self.max_pending = max_pending
+        self.pending = 0
+        self.sessions = {}
+        self.metrics = Metrics()
+        self._next_id = 0
+        # One single-process pool per worker, so a session always lands on the same process
+        self.workers = [ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(tt_size_bits,))
+                        for _ in range(workers)]
+        self._worker_load = [0] * workers
+        self._worker_deadlines = [[] for _ in range(workers)]  # deadlines of the searches on each worker
+
+    def close(self):
+        for pool in self.workers:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _session(self, args):
+        if not args:
+            raise ProtocolError("missing session")
+        session = self.sessions.get(args[0])
+        if session is None:
+            raise ProtocolError(f"no session {args[0]}")
+        return session
+
+    @staticmethod
+    def _ints(args, count, defaults=()):
+        values = list(args[:count])
+        try:
+            values = [int(value) for value in values] + list(defaults[len(values):])
+        except ValueError:
+            raise ProtocolError(f"bad number in {' '.join(args)}")
+        if len(values) < count:
+            raise ProtocolError("missing argument")
+        return values
+
+    async def handle(self, line):
+        """Answer one request line."""
+        self.metrics.requests += 1
+        words = line.split()
+        if not words:
+            return "ERR empty request"
+        command, args = words[0].upper(), words[1:]
+        try:
+            if command == "NEW":
+                return self.new_session()
+            if command == "MOVE":
+                session = self._session(args)
+                row, col = self._ints(args[1:], 2)
+                self._play(session, row, col)
+                return "OK"
+            if command == "UNDO":
+                session = self._session(args)
+                if session.busy or not session.state.undo_move():
+                    raise ProtocolError("nothing to undo" if not session.busy else "session is searching")
+                session.moves.pop()
+                return "OK"
+            if command in ("SEARCH", "PLAY"):
+                session = self._session(args)
+                ms, depth = self._ints(args[1:], 2, (int(self.time_limit * 1000), self.depth))
+                move, nodes, reached, elapsed = await self.search(session, ms / 1000.0, depth)
+                if command == "PLAY":
+                    self._play(session, move[0], move[1])
+                return f"BEST {move[0]} {move[1]} {nodes} {reached} {elapsed * 1000:.0f}"
+            if command == "BOARD":
+                session = self._session(args)
+                rows = ["".join(STONES[stone] for stone in row) for row in session.state.board]
+                return f"BOARD {STONES[session.state.current_player]} {' '.join(rows)}"
+            if command == "CLOSE":
+                session = self._session(args)
+                del self.sessions[session.id]
+                self._worker_load[session.worker] -= 1
+                self.workers[session.worker].submit(_drop_session, session.id)
+                return "OK"
+            if command == "STATS":
+                return "STATS " + json.dumps(self.metrics.snapshot(self.pending, len(self.sessions)))
+            raise ProtocolError(f"unknown command {command}")
+        except ProtocolError as error:
+            self.metrics.errors += 1
+            return f"ERR {error}"
+
+    def new_session(self):
+        self._next_id += 1
+        session_id = f"s{self._next_id}"
+        worker = min(range(len(self.workers)), key=self._worker_load.__getitem__)
+        self._worker_load[worker] += 1
+        self.sessions[session_id] = Session(session_id, worker)
+        return f"OK {session_id}"
+
+    def _play(self, session, row, col):
+        if session.busy:
+            raise ProtocolError("session is searching")
+        if session.state.game_over:
+            raise ProtocolError("game is over")
+        if not session.state.make_move(row, col):
+            raise ProtocolError(f"illegal move {row} {col}")
+        session.moves.append((row, col))
+
+    async def search(self, session, time_limit, depth):
+        """Run a search on the session's worker; returns (move, nodes, depth, seconds)."""
+        if session.state.game_over:
+            raise ProtocolError("game is over")
+        if session.busy:
+            raise ProtocolError("session is searching")
+        start = time.time()
+        deadline = start + time_limit
+        # Searches queued on the worker each run until their own deadline at most
+        queued = self._worker_deadlines[session.worker]
+        free_at = max([start] + queued)
+        if ((self.max_pending is not None and self.pending >= self.max_pending)
+                or deadline - free_at < time_limit * MIN_SEARCH_SHARE):
+            self.metrics.rejected += 1
+            raise ProtocolError("busy")
+
+        self.pending += 1
+        queued.append(deadline)
+        session.busy = True
+        try:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.workers[session.worker], _search,
+                                          session.id, list(session.moves), deadline, depth)
+            try:
+                result = await asyncio.wait_for(future, deadline + DEADLINE_GRACE - time.time())
+            except asyncio.TimeoutError:
+                result = None
+            if result is None:
+                self.metrics.timeouts += 1
+                raise ProtocolError("deadline exceeded")
+            move, nodes, reached = result
+        finally:
+            self.pending -= 1
+            queued.remove(deadline)
+            session.busy = False
+        if move is None:
+            raise ProtocolError("no legal move")
+
+        elapsed = time.time() - start
+        self.metrics.searches += 1
+        self.metrics.latencies.append(elapsed)
+        return move, nodes, reached, elapsed
+
+    async def serve_connection(self, reader, writer):
+        """Answer requests from one client in order until it disconnects or sends QUIT."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line or line.strip().upper() == b"QUIT":
+                    break
+                response = await self.handle(line.decode(errors="replace"))
+                writer.write(response.encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve_tcp(self, host, port):
+        server = await asyncio.start_server(self.serve_connection, host, port)
+        print(f"listening on {host}:{port}", file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    async def serve_stdio(self):
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        while True:
+            line = await reader.readline()
+            if not line or line.strip().upper() == b"QUIT":
+                break
+            sys.stdout.write(await self.handle(line.decode(errors="replace")) + "\n")
+            sys.stdout.flush()
+
+
+async def _load_client(host, port, moves, time_ms, latencies, errors, refused):
+    """Play one game against the server, the engine moving for both sides.
+    
+    A move refused with "ERR busy" is retried after waiting one search time.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+
+    async def request(line):
+        writer.write(line.encode() + b"\n")
+        await writer.drain()
+        return (await reader.readline()).decode().strip()
+
+    session = (await request("NEW")).split()[1]
+    for _ in range(moves):
+        start = time.time()
+        response = await request(f"PLAY {session} {time_ms}")
+        while response == "ERR busy":
+            refused[0] += 1
+            await asyncio.sleep(time_ms / 1000.0)
+            start = time.time()
+            response = await request(f"PLAY {session} {time_ms}")
+        if not response.startswith("BEST"):
+            errors[response] += 1
+            if "game is over" in response:
+                break
+            continue
+        latencies.append(time.time() - start)
+    await request(f"CLOSE {session}")
+    writer.write(b"QUIT\n")
+    writer.close()
+
+
+async def run_load(host, port, clients, moves, time_ms):
+    """Run clients games at once against a server and report latency and throughput."""
+    latencies = []
+    errors = collections.Counter()
+    refused = [0]
+    start = time.time()
+    await asyncio.gather(*(_load_client(host, port, moves, time_ms, latencies, errors, refused)
+                           for _ in range(clients)))
+    elapsed = time.time() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b"STATS\n")
+    await writer.drain()
+    server_stats = json.loads((await reader.readline()).decode().split(" ", 1)[1])
+    writer.close()
+
+    latencies.sort()
+    summary = {
+        "clients": clients,
+        "searches": len(latencies),
+        "seconds": round(elapsed, 2),
+        "searches_per_sec": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": {p: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 1)
+                       for p, q in (("p50", 0.5), ("p95", 0.95), ("max", 1.0))} if latencies else {},
+        "refused": refused[0],
+        "errors": dict(errors),
+        "server": server_stats,
+    }
+    return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve many Pente games over a line protocol.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="run the server")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve.add_argument("--stdio", action="store_true", help="read requests from stdin instead of TCP")
+    serve.add_argument("--workers", type=int, default=2, help="search processes")
+    serve.add_argument("--max-pending", type=int, default=None,
+                       help="searches in flight before refusing more (default: only worker deadlines limit them)")
+    serve.add_argument("--time", type=float, default=1.0, help="default search time (seconds)")
+    serve.add_argument("--depth", type=int, default=3, help="default search depth")
+    serve.add_argument("--tt-bits", type=int, default=16, help="transposition table size per session (log2)")
+
+    load = commands.add_parser("load", help="load-test a running server")
+    load.add_argument("--host", default="127.0.0.1")
+    load.add_argument("--port", type=int, default=DEFAULT_PORT)
+    load.add_argument("--clients", type=int, default=16, help="games played at once")
+    load.add_argument("--moves", type=int, default=10, help="engine moves per game")
+    load.add_argument("--time-ms", type=int, default=200)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "load":
+        summary = asyncio.run(run_load(args.host, args.port, args.clients, args.moves, args.time_ms))
+        json.dump(summary, sys.stdout, indent=2)
+        print()
+        return 1 if summary["errors"] else 0
+
+    server = AnalysisServer(args.workers, args.max_pending, args.time, args.depth, args.tt_bits)
+    try:
+        if args.stdio:
+            asyncio.run(server.serve_stdio())
+        else:
+            asyncio.run(server.serve_tcp(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())